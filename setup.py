@@ -1,8 +1,17 @@
+import re
+from pathlib import Path
 from setuptools import setup, find_packages
 
+# defined once in the package, which can not be imported before wx is installed
+version = re.search(
+    r"^__version__ = '([^']+)'",
+    (Path(__file__).parent / 'wxml' / '__init__.py').read_text(),
+    re.M
+).group(1)
+
 setup(
     name='wxml',
-    version='0.9.2',
+    version=version,
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
@@ -0,0 +1,132 @@
+import concurrent.futures
+
+import pytest
+
+wx = pytest.importorskip('wx')
+
+import wxml.decorators
+from wxml.bind import BackgroundDynamicValue, BindValue
+
+
+class Pool(object):
+    """
+        Runs the submitted computations when told to
+    """
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn):
+        future = concurrent.futures.Future()
+        self.jobs.append((future, fn))
+        return future
+
+    def run(self, index=0):
+        future, fn = self.jobs.pop(index)
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn())
+            except Exception as ex:
+                future.set_exception(ex)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = Pool()
+    monkeypatch.setattr(BackgroundDynamicValue, 'pool', classmethod(lambda cls: pool))
+    # the results are set on the UI thread, right away here
+    monkeypatch.setattr(wx, 'CallAfter', lambda func, *args: func(*args))
+    return pool
+
+
+@pytest.fixture
+def doubled(pool):
+    source = BindValue(1)
+    value = BackgroundDynamicValue(source, update=lambda: source.value * 2)
+    pool.run()
+    return source, value
+
+
+def test_value_is_set_once_computed(pool, doubled):
+    source, value = doubled
+    assert value.value == 2
+
+    source.value = 5
+    assert value.value == 2
+
+    pool.run()
+    assert value.value == 10
+
+
+def test_only_the_newest_result_is_applied(pool, doubled):
+    source, value = doubled
+    seen = []
+    value.after_changed += seen.append
+
+    source.value = 2
+    source.value = 3
+    # the first was cancelled before it started
+    assert pool.jobs[0][0].cancelled()
+
+    pool.run(1)
+    pool.run(0)
+
+    assert value.value == 6
+    assert seen == [6]
+
+
+def test_older_result_finishing_last_is_dropped(pool, doubled):
+    source, value = doubled
+    source.value = 2
+    future, fn = pool.jobs[0]
+    # already running, so it can not be cancelled
+    assert future.set_running_or_notify_cancel()
+
+    source.value = 3
+    pool.run(1)
+    future.set_result(fn())
+
+    assert value.value == 6
+
+
+def test_is_computing_while_running(pool, doubled):
+    source, value = doubled
+    assert value.is_computing.value is False
+
+    source.value = 4
+    assert value.is_computing.value is True
+
+    pool.run()
+    assert value.is_computing.value is False
+
+
+def test_cancel_keeps_the_value(pool, doubled):
+    source, value = doubled
+    source.value = 4
+
+    value.cancel()
+
+    assert value.is_computing.value is False
+    assert pool.jobs[0][0].cancelled()
+    pool.run()
+    assert value.value == 2
+
+
+def test_exception_is_passed_to_the_handler(pool, monkeypatch):
+    errors = []
+    monkeypatch.setattr(wxml.decorators.background, 'handler', lambda ex, info: errors.append(ex))
+    source = BindValue(1)
+
+    def update():
+        if source.value == 0:
+            raise ZeroDivisionError()
+        return 1 / source.value
+
+    value = BackgroundDynamicValue(source, update=update)
+    pool.run()
+
+    source.value = 0
+    pool.run()
+
+    assert [type(ex) for ex in errors] == [ZeroDivisionError]
+    assert value.value == 1
+    assert value.is_computing.value is False
@@ -0,0 +1,109 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml import bind
+from wxml.bind import BindValue, DynamicValue
+
+
+class Widget(object):
+    def __init__(self):
+        self.writes = []
+
+    def write(self, value):
+        self.writes.append(value)
+
+
+def test_targets_are_updated_once_with_the_final_value():
+    value = BindValue(0)
+    widget = Widget()
+    value.add_target(widget, widget.write)
+
+    with bind.batch():
+        value.value = 1
+        value.value = 2
+        value.value = 3
+        assert widget.writes == []
+
+    assert widget.writes == [3]
+
+
+def test_dependents_are_recomputed_once():
+    values = [BindValue(i) for i in range(10)]
+    calls = []
+    total = DynamicValue(*values, update=lambda: calls.append(1) or sum(v.value for v in values))
+    calls.clear()
+
+    with bind.batch():
+        for v in values:
+            v.value += 100
+
+    assert len(calls) == 1
+    assert total.value == sum(range(10)) + 1000
+
+
+def test_nested_batches_flush_when_the_outermost_exits():
+    value = BindValue(0)
+    widget = Widget()
+    value.add_target(widget, widget.write)
+
+    with bind.batch():
+        with bind.batch():
+            value.value = 1
+        assert widget.writes == []
+        value.value = 2
+
+    assert widget.writes == [2]
+
+
+def test_batch_as_decorator():
+    value = BindValue(0)
+    widget = Widget()
+    value.add_target(widget, widget.write)
+
+    @bind.batch()
+    def handler():
+        value.value = 1
+        value.value = 2
+
+    handler()
+
+    assert widget.writes == [2]
+
+
+def test_previous_is_the_value_from_before_the_batch():
+    value = BindValue('a')
+
+    with bind.batch():
+        value.value = 'b'
+        value.value = 'c'
+
+    assert value._previous == 'a'
+
+
+def test_value_set_back_is_not_sent():
+    value = BindValue('a')
+    widget = Widget()
+    value.add_target(widget, widget.write)
+    after = []
+    value.after_changed += after.append
+
+    with bind.batch():
+        value.value = 'b'
+        value.value = 'a'
+
+    assert widget.writes == []
+    assert after == []
+
+
+def test_touched_value_set_back_is_sent():
+    value = BindValue('a')
+    widget = Widget()
+    value.add_target(widget, widget.write)
+
+    with bind.batch():
+        value.value = 'b'
+        value.value = 'a'
+        value.touch()
+
+    assert widget.writes == ['a']
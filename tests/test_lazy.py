@@ -0,0 +1,80 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.bind import BindValue, DynamicValue
+
+
+def test_not_computed_until_read():
+    data = BindValue([1, 2, 3])
+    calls = []
+    total = DynamicValue(data, update=lambda: calls.append(1) or sum(data.value), lazy=True)
+
+    data.value = [1, 2]
+    data.value = [4, 5]
+    assert calls == []
+
+    assert total.value == 9
+    assert total.value == 9
+    assert len(calls) == 1
+
+
+def test_lazy_chain_computed_when_read():
+    data = BindValue(list(range(10)))
+    calls = []
+    total = DynamicValue(data, update=lambda: calls.append('total') or sum(data.value), lazy=True)
+    avg = DynamicValue(total, data, update=lambda: calls.append('avg') or total.value / len(data.value), lazy=True)
+
+    for i in range(5):
+        data.value = list(range(10 + i))
+    assert calls == []
+
+    assert avg.value == 6.5
+    assert sorted(calls) == ['avg', 'total']
+
+
+def test_computed_when_changed_while_needed():
+    data = BindValue([1])
+    total = DynamicValue(data, update=lambda: sum(data.value), lazy=True)
+    seen = []
+    total.after_changed += seen.append
+
+    data.value = [1, 2]
+
+    assert seen == [3]
+
+
+def test_eager_dependent_keeps_lazy_value_computed():
+    data = BindValue([1])
+    total = DynamicValue(data, update=lambda: sum(data.value), lazy=True)
+    doubled = DynamicValue(total, update=lambda: total.value * 2)
+
+    data.value = [4, 5]
+
+    assert doubled.value == 18
+
+
+def test_dependent_of_unread_value_is_invalidated():
+    x = BindValue(1)
+    # never read, so stays stale
+    unread = DynamicValue(x, update=lambda: x.value * 10, lazy=True)
+    # only uses unread as a trigger
+    dependent = DynamicValue(unread, update=lambda: x.value + 100, lazy=True)
+    assert dependent.value == 101
+
+    x.value = 7
+
+    assert dependent.value == 107
+    assert unread.recomputes == 0
+
+
+def test_lazy_cycle_does_not_loop():
+    x = BindValue(1)
+    a = DynamicValue(x, update=lambda: 1, lazy=True)
+    b = DynamicValue(a, update=lambda: 2, lazy=True)
+    a.add_target(b, b.update)
+    b.add_target(a, a.update)
+
+    x.value = 2
+
+    assert (a.value, b.value) == (1, 2)
@@ -0,0 +1,116 @@
+import types
+from xml.etree import ElementTree as ET
+
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.builder import UiBuilder
+
+
+class Window(object):
+    def __init__(self, shown=True):
+        self.Sizer = None
+        self.shown = shown
+        self.bound = []
+        self.widgets = {}
+        self.models = {}
+
+    def IsShown(self):
+        return self.shown
+
+    def Bind(self, event, handler, *source):
+        self.bound.append((event, handler) + source)
+
+    def Unbind(self, event, handler=None):
+        self.bound = [b for b in self.bound if b[:2] != (event, handler)]
+
+
+class ShowEvent(object):
+    def Skip(self):
+        pass
+
+
+@pytest.fixture
+def builder():
+    builder = UiBuilder('view.xml', loader=True)
+    builder.init_build(types.SimpleNamespace())
+    return builder
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """
+        Replaces compiling the children of a Lazy node, fn(builder) is run
+        for each build instead
+    """
+    builds = []
+
+    def use(fn):
+        def compile_children(builder, node, obj, parent, params):
+            builds.append(node.tag)
+            fn(builder)
+        monkeypatch.setattr(UiBuilder, 'compile_children', compile_children)
+        return builds
+
+    return use
+
+
+def test_showing_during_the_build_waits_for_the_view(builder, compiled):
+    builds = compiled(lambda b: None)
+    obj = Window(shown=False)
+    builder.defer_children(ET.Element('Panel'), obj, None, {})
+    (event, on_event), = obj.bound
+
+    # like a page being selected before the view is finished
+    obj.shown = True
+    on_event(ShowEvent())
+    assert builds == []
+
+    builder.start_lazy(Window())
+    assert builds == ['Panel']
+    assert obj.bound == []
+
+
+def test_failed_build_is_tried_again(builder, monkeypatch):
+    builds = []
+
+    def compile_lazy(self, builder, node, obj, parent, params, view):
+        builds.append(node.tag)
+        if len(builds) == 1:
+            raise RuntimeError('not yet')
+    monkeypatch.setattr(UiBuilder, 'compile_lazy', compile_lazy)
+
+    obj = Window(shown=False)
+    builder.defer_children(ET.Element('Panel'), obj, None, {})
+    builder.start_lazy(Window())
+    (event, on_event), = obj.bound
+
+    obj.shown = True
+    with pytest.raises(RuntimeError):
+        on_event(ShowEvent())
+    assert len(obj.bound) == 1
+
+    on_event(ShowEvent())
+    assert builds == ['Panel', 'Panel']
+    assert obj.bound == []
+
+
+def test_menu_under_lazy_node(builder, compiled):
+    item = object()
+
+    def add_menu(b):
+        # what create_menu leaves behind for a menu item
+        b.debug_names[item] = 'open_item'
+        b.events.setdefault(None, []).append(('EVT_MENU', None, item))
+    compiled(add_menu)
+
+    view = Window()
+    builder.defer_children(ET.Element('Panel'), Window(), None, {})
+    builder.start_lazy(view)
+
+    (event, handler, source), = view.bound
+    assert event == wx.EVT_MENU
+    assert source is item
+    assert view.open_item is handler
+    assert view.widgets['open_item'] is item
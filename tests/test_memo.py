@@ -0,0 +1,111 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.bind import BindValue, DynamicValue
+
+
+def test_results_for_known_inputs_are_reused():
+    rows = BindValue(list(range(100)))
+    parity = BindValue('even')
+    calls = []
+
+    def filtered():
+        calls.append(parity.value)
+        return [r for r in rows.value if (r % 2 == 0) == (parity.value == 'even')]
+
+    shown = DynamicValue(rows, parity, update=filtered, memoize=8)
+    for value in ['odd', 'even', 'odd', 'even']:
+        parity.value = value
+
+    assert calls == ['even', 'odd']
+    assert len(shown.value) == 50
+    assert shown.memo.stats()['hits'] == 3
+
+
+def test_lists_are_keyed_by_content():
+    rows = BindValue([1, 2])
+    calls = []
+    total = DynamicValue(rows, update=lambda: calls.append(1) or sum(rows.value), memoize=4)
+
+    rows.value = [3]
+    rows.value = [1, 2]
+
+    assert len(calls) == 2
+    assert total.value == 3
+
+
+def test_key_replaces_the_listeners_values():
+    text = BindValue('even')
+    calls = []
+    upper = DynamicValue(text, update=lambda: calls.append(text.value) or text.value.upper(), memoize=2,
+                         key=lambda: text.value[0])
+
+    text.value = 'odd'
+    text.value = 'eager'
+
+    assert calls == ['even', 'odd']
+    assert upper.value == 'EVEN'
+
+
+def test_oldest_results_are_dropped():
+    value = BindValue(0)
+    calls = []
+    DynamicValue(value, update=lambda: calls.append(value.value) or value.value, memoize=2)
+
+    for v in [1, 2, 0]:
+        value.value = v
+
+    assert calls == [0, 1, 2, 0]
+
+
+def test_unhashable_inputs_are_not_memoized():
+    value = BindValue(object())
+    calls = []
+    DynamicValue(value, update=lambda: calls.append(1), memoize=4, key=lambda: [value.value])
+
+    value.touch()
+
+    assert len(calls) == 2
+
+
+def test_nothing_is_memoized_without_listeners_or_key():
+    count = [0]
+
+    def update():
+        count[0] += 1
+        return count[0]
+
+    counter = DynamicValue(update=update, memoize=4)
+    counter.update()
+    counter.update()
+
+    assert counter.value == 3
+    assert len(counter.memo) == 0
+
+
+@pytest.mark.parametrize('first, second', [
+    ([1, 2], (1, 2)),
+    ({'a': 1}, [('a', 1)]),
+    ({1, 2}, [1, 2]),
+])
+def test_equal_contents_of_other_types_are_not_shared(first, second):
+    value = BindValue(first)
+    kind = DynamicValue(value, update=lambda: type(value.value), memoize=4)
+
+    value.value = second
+    assert kind.value is type(second)
+
+    value.value = first
+    assert kind.value is type(first)
+
+
+def test_dicts_are_keyed_without_their_order():
+    value = BindValue({'a': 1, 'b': 2})
+    calls = []
+    DynamicValue(value, update=lambda: calls.append(1), memoize=4)
+
+    value.value = {}
+    value.value = {'b': 2, 'a': 1}
+
+    assert len(calls) == 2
@@ -0,0 +1,31 @@
+import sys
+import types
+
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.builder import WxNamespace
+
+
+def test_missing_names_are_looked_up_again_after_an_import(monkeypatch):
+    namespace = WxNamespace()
+    assert namespace.lookup('NotInWx') is None
+
+    monkeypatch.setattr(wx, 'NotInWx', 1, raising=False)
+    assert namespace.lookup('NotInWx') is None
+
+    monkeypatch.setitem(sys.modules, 'wx.not_in_wx', types.ModuleType('wx.not_in_wx'))
+    assert namespace.lookup('NotInWx') == 1
+
+
+def test_names_found_later_can_be_evaluated(monkeypatch):
+    namespace = WxNamespace()
+    assert namespace.evaluate('1 + 1') == 2
+    scope = namespace._globals
+
+    monkeypatch.setattr(wx, 'SetLater', 41, raising=False)
+    assert namespace.lookup('SetLater') == 41
+
+    assert namespace._globals is scope
+    assert namespace.evaluate('SetLater + 1') == 42
@@ -0,0 +1,46 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.plan import BuildPlan
+
+
+@pytest.fixture
+def view(tmp_path, monkeypatch):
+    monkeypatch.setattr(BuildPlan, 'Directory', None)
+    monkeypatch.setattr(BuildPlan, 'Persist', True)
+    monkeypatch.setattr('sys.dont_write_bytecode', False)
+    path = tmp_path / 'view.xml'
+    path.write_bytes(b'<Frame><Button label="Hi" /></Frame>')
+    return path
+
+
+def test_plan_is_written_next_to_the_view(view):
+    BuildPlan.read(view)
+    assert BuildPlan.cache_file(view).exists()
+
+    hits = BuildPlan.hits
+    assert BuildPlan.read(view).root.tag == 'Frame'
+    assert BuildPlan.hits == hits + 1
+
+
+def test_plan_is_not_written_without_persist(view, monkeypatch):
+    monkeypatch.setattr(BuildPlan, 'Persist', False)
+
+    assert BuildPlan.read(view).root.tag == 'Frame'
+    assert not (view.parent / '__pycache__').exists()
+
+
+def test_plan_is_not_written_with_dont_write_bytecode(view, monkeypatch):
+    monkeypatch.setattr('sys.dont_write_bytecode', True)
+
+    BuildPlan.read(view)
+    assert not (view.parent / '__pycache__').exists()
+
+
+def test_write_failure_is_ignored(view):
+    # a file where the cache directory should be
+    (view.parent / '__pycache__').write_bytes(b'')
+
+    assert BuildPlan.read(view).root.tag == 'Frame'
+    assert sorted(p.name for p in view.parent.iterdir()) == ['__pycache__', 'view.xml']
@@ -0,0 +1,88 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml import bind
+from wxml.bind import ArrayBindValue, BindValue, DynamicValue
+
+
+@pytest.fixture
+def diamond():
+    """
+        A -> B, C -> D -> E, with E also depending on A
+    """
+    seen = []
+    a = BindValue(1)
+    b = DynamicValue(a, update=lambda: a.value * 2)
+    c = DynamicValue(a, update=lambda: a.value + 10)
+    d = DynamicValue(b, c, update=lambda: seen.append((b.value, c.value)) or b.value + c.value)
+    e = DynamicValue(d, a, update=lambda: d.value - a.value)
+    seen.clear()
+    return a, b, c, d, e, seen
+
+
+def test_ranks_follow_dependencies(diamond):
+    a, b, c, d, e, _ = diamond
+    assert (a.rank, b.rank, c.rank, d.rank, e.rank) == (0, 1, 1, 2, 3)
+
+
+def test_diamond_is_recomputed_once_without_glitches(diamond):
+    a, b, c, d, e, seen = diamond
+    recomputes = d.recomputes
+
+    a.value = 5
+
+    # d never sees b updated and c not yet updated, or the other way around
+    assert seen == [(10, 15)]
+    assert d.recomputes == recomputes + 1
+    assert e.value == 20
+
+
+def test_after_changed_sees_recomputed_values(diamond):
+    a, b, c, d, e, _ = diamond
+    after = []
+    a.after_changed += lambda value: after.append((d.value, e.value))
+
+    a.value = 5
+
+    assert after == [(25, 20)]
+
+
+def test_batch_recomputes_diamond_once(diamond):
+    a, b, c, d, e, seen = diamond
+
+    with bind.batch():
+        a.value = 6
+        a.value = 7
+
+    assert seen == [(14, 17)]
+    assert e.value == 24
+
+
+def test_targets_updated_in_rank_order(diamond):
+    a, b, c, d, e, _ = diamond
+    order = []
+
+    class Widget(object):
+        pass
+
+    widget = Widget()
+    for name, value in zip('abcde', (a, b, c, d, e)):
+        value.add_target(widget, lambda v, name=name: order.append(name))
+
+    a.value = 2
+
+    assert order.index('a') < order.index('b') < order.index('d') < order.index('e')
+    assert order.index('c') < order.index('d')
+    assert sorted(order) == list('abcde')
+
+
+def test_array_selection_is_preserved_in_a_batch():
+    array = ArrayBindValue(['a', 'b', 'c'])
+    array.index.value = 2
+
+    with bind.batch():
+        array.value = ['c', 'q']
+
+    assert array.index.value == 0
+    assert array.item.value == 'c'
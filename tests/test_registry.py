@@ -0,0 +1,59 @@
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml.builder import Node, Registry, UiBuilder
+
+
+def test_changed_fires_only_for_real_changes():
+    registry = Registry()
+    fired = []
+    registry.changed += fired.append
+
+    obj = object()
+    registry['a'] = obj
+    registry['a'] = obj
+    registry.setdefault('a', None)
+    registry.update(b=obj)
+    registry.pop('missing', None)
+    registry['a'] = object()
+    del registry['b']
+
+    assert fired == ['a', 'b', 'a', 'b']
+
+
+def test_clear_fires_for_every_key():
+    registry = Registry(a=1, b=2)
+    fired = []
+    registry.changed += fired.append
+
+    registry.clear()
+
+    assert sorted(fired) == ['a', 'b']
+
+
+def test_registering_a_component_keeps_other_resolutions():
+    cache = UiBuilder.resolve_cache
+    cache.put(('test_registry_Other', True, False), ('literal', 1))
+    cache.put(('test_registry_Comp', True, False), ('str', 'test_registry_Comp'))
+
+    UiBuilder.components['test_registry_Comp'] = object()
+    try:
+        assert ('test_registry_Other', True, False) in cache
+        assert ('test_registry_Comp', True, False) not in cache
+    finally:
+        del UiBuilder.components['test_registry_Comp']
+        cache.discard(('test_registry_Other', True, False))
+
+
+def test_registering_a_component_keeps_other_dispatch_entries():
+    Node.dispatch[('test_registry_Other', False)] = None
+    Node.dispatch[('test_registry_Comp', False)] = None
+
+    UiBuilder.components['test_registry_Comp'] = object()
+    try:
+        assert ('test_registry_Other', False) in Node.dispatch
+        assert ('test_registry_Comp', False) not in Node.dispatch
+    finally:
+        del UiBuilder.components['test_registry_Comp']
+        Node.dispatch.pop(('test_registry_Other', False), None)
@@ -0,0 +1,190 @@
+import types
+from xml.etree import ElementTree as ET
+
+import pytest
+
+wx = pytest.importorskip('wx')
+
+from wxml import bind
+from wxml.builder import Control, Repeater
+
+
+class Sizer(object):
+    def __init__(self):
+        self.items = []
+        self.moves = []
+
+    def Detach(self, obj):
+        self.items.remove(obj)
+        self.moves.append(('detach', obj))
+
+    def Insert(self, index, obj, *flags):
+        self.items.insert(index, obj)
+        self.moves.append(('insert', obj, index))
+
+
+class Host(object):
+    def __init__(self):
+        self.Sizer = Sizer()
+        self.bound = []
+
+    def Freeze(self):
+        pass
+
+    def Thaw(self):
+        pass
+
+    def Layout(self):
+        pass
+
+    def GetParent(self):
+        return None
+
+    def Bind(self, event, handler):
+        self.bound.append((event, handler))
+
+
+class Row(object):
+    def __init__(self, item):
+        self.item = item
+        self.items = [(('row', item['id']), (0, 0, 0))]
+        self.disposed = False
+        self.unbound = False
+
+    def dispose(self, sizer):
+        self.disposed = True
+        for obj, _ in self.items:
+            sizer.Detach(obj)
+
+    def unbind(self):
+        self.unbound = True
+
+
+class FakeRepeater(Repeater):
+    def __init__(self, key='id'):
+        node = ET.Element('Repeat', {'Key': key} if key else {})
+        super().__init__(types.SimpleNamespace(styles=None), node, Host(), {})
+        self.built = []
+
+    def build_row(self, item):
+        self.built.append(item['id'])
+        return Row(item)
+
+    def shown(self):
+        return [obj[1] for obj in self.host.Sizer.items]
+
+
+class Event(object):
+    def __init__(self, obj):
+        self.obj = obj
+
+    def Skip(self):
+        pass
+
+    def GetEventObject(self):
+        return self.obj
+
+
+@pytest.fixture(autouse=True)
+def no_layout(monkeypatch):
+    monkeypatch.setattr(Control, 'layout_later', staticmethod(lambda window: None))
+
+
+def items(*ids):
+    return [{'id': i} for i in ids]
+
+
+@pytest.mark.parametrize('positions, length', [
+    ([], 0),
+    ([0, 1, 2], 3),
+    ([4, 0, 1, 2, 3], 4),
+    ([1, 2, 3, 4, 0], 4),
+    ([2, 1, 0], 1),
+    ([3, 0, 4, 1, 2], 3),
+])
+def test_stable_is_longest_increasing_run(positions, length):
+    stable = Repeater.stable(positions)
+    assert len(stable) == length
+    kept = [positions[i] for i in sorted(stable)]
+    assert kept == sorted(kept)
+
+
+def test_repeated_keys_stay_unique():
+    repeater = FakeRepeater()
+    assert repeater.keys(items(1, 2, 1)) == [(1, 0), (2, 0), (1, 1)]
+
+
+def test_items_are_their_own_key_without_key():
+    repeater = FakeRepeater(key=None)
+    assert repeater.keys(['a', 'b', 'a']) == [('a', 0), ('b', 0), ('a', 1)]
+
+
+def test_moving_one_row_moves_only_that_row():
+    repeater = FakeRepeater()
+    first = items(0, 1, 2, 3, 4)
+    repeater.update(first)
+    repeater.host.Sizer.moves.clear()
+
+    repeater.update([first[4]] + first[:4])
+
+    assert repeater.shown() == [4, 0, 1, 2, 3]
+    assert repeater.host.Sizer.moves == [('detach', ('row', 4)), ('insert', ('row', 4), 0)]
+    assert repeater.built == [0, 1, 2, 3, 4]
+
+
+def test_removed_rows_are_disposed_and_new_rows_built():
+    repeater = FakeRepeater()
+    first = items(0, 1, 2)
+    repeater.update(first)
+    rows = dict(repeater.rows)
+
+    repeater.update([first[0], {'id': 9}, first[2]])
+
+    assert repeater.shown() == [0, 9, 2]
+    assert rows[(1, 0)].disposed
+    assert not rows[(0, 0)].disposed and not rows[(2, 0)].disposed
+    assert repeater.built == [0, 1, 2, 9]
+
+
+def test_replaced_item_is_built_again():
+    repeater = FakeRepeater()
+    repeater.update(items(0, 1))
+    old = repeater.rows[(1, 0)]
+
+    repeater.update([{'id': 0}, {'id': 1, 'name': 'changed'}])
+
+    assert old.disposed
+    assert repeater.rows[(1, 0)].item == {'id': 1, 'name': 'changed'}
+    assert repeater.shown() == [0, 1]
+
+
+def test_source_changes_update_rows():
+    repeater = FakeRepeater()
+    source = bind.BindValue(items(0, 1))
+    repeater.watch(source)
+    repeater.update(source.value)
+
+    source.value = items(1, 2)
+
+    assert repeater.shown() == [1, 2]
+
+
+def test_destroying_the_host_stops_following_the_source():
+    repeater = FakeRepeater()
+    source = bind.BindValue(items(0, 1))
+    repeater.watch(source)
+    repeater.update(source.value)
+    rows = list(repeater.rows.values())
+    (event, on_destroy), = repeater.host.bound
+    assert event is wx.EVT_WINDOW_DESTROY
+
+    # destroy events of the rows' widgets come up to the host too
+    on_destroy(Event(object()))
+    assert any(t.obj is repeater for t in source.targets)
+
+    on_destroy(Event(repeater.host))
+    assert not any(t.obj is repeater for t in source.targets)
+    assert all(row.unbound for row in rows)
+
+    source.value = items(5)
+    assert repeater.built == [0, 1]
@@ -1,5 +1,7 @@
+__version__ = '0.9.2'
+
 from wxml.builder import Ui, Control, GenericViewModel, ViewModel, run, ErrorViewModel, load_components
 from wxml.decorators import invoke_ui, background, block_ui, stop_bind_updates
-from wxml.bind import BindValue, DynamicValue, ArrayBindValue, DynamicArrayBindValue, Transformer
+from wxml.bind import BindValue, DynamicValue, ArrayBindValue, DynamicArrayBindValue, BackgroundDynamicValue, Transformer
 from wxml.event import Event
 from wxml.utils import Resources
\ No newline at end of file
@@ -5,6 +5,14 @@ from pathlib import Path
 import wx
 import wxml
 
+if len(sys.argv) > 1 and sys.argv[1] == 'compile':
+    from wxml.compiler import main
+    sys.exit(main(sys.argv[2:]))
+
+if len(sys.argv) > 1 and sys.argv[1] == 'atlas':
+    from wxml.atlas import main
+    sys.exit(main(sys.argv[2:]))
+
 parser = argparse.ArgumentParser()
 parser.add_argument('filename', type=Path, help='Xml file to build and run UI for')
 parser.add_argument('--inspect', '-i', action='store_true', help='Opens the wxpython inspector after construction')
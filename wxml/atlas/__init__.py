@@ -0,0 +1,140 @@
+"""
+    Packs a directory of icons into a single atlas image, with an index of
+    where each icon is, so they can be loaded with one file read.
+
+        python -m wxml atlas <directory> [--output icons.png]
+
+    The index is written next to the image (icons.png -> icons.json), and
+    the atlas is used with an Atlas node in Bitmaps.
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import wx
+
+# bumped whenever the layout of the index changes
+ATLAS_FORMAT = 1
+
+IMAGE_SUFFIXES = ('.png', '.bmp', '.gif', '.jpg', '.jpeg', '.ico', '.xpm', '.tif', '.tiff')
+
+
+def index_file(image : Path) -> Path:
+    return Path(image).with_suffix('.json')
+
+
+def pack(sizes : Dict[str, Tuple[int, int]], padding : int = 1) -> Tuple[Dict[str, Tuple[int, int]], Tuple[int, int]]:
+    """
+        Places rectangles of the given sizes in rows, tallest first, on a sheet
+        about as wide as it is tall. Returns the position of each rectangle, and
+        the size of the sheet.
+    """
+    if not sizes:
+        return {}, (0, 0)
+
+    area = sum((w + padding) * (h + padding) for w, h in sizes.values())
+    width = max(max(w for w, h in sizes.values()), math.ceil(math.sqrt(area)))
+
+    positions = {}
+    x = y = row_height = 0
+
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x > 0 and x + w > width:
+            x = 0
+            y += row_height + padding
+            row_height = 0
+
+        positions[name] = (x, y)
+        x += w + padding
+        row_height = max(row_height, h)
+
+    return positions, (width, y + row_height)
+
+
+def find_images(directory : Path) -> List[Path]:
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def build_atlas(files : List[Path], output : Path, padding : int = 1) -> Dict[str, List[int]]:
+    """
+        Writes the atlas image for files to output, and its index next to it.
+        Icons are named by their file name, without the suffix.
+    """
+    images = {}
+    for f in files:
+        if f.stem in images:
+            raise ValueError('more than one icon named %s' % f.stem)
+
+        image = wx.Image(str(f))
+        if not image.IsOk():
+            raise ValueError('%s could not be read' % f)
+        if not image.HasAlpha():
+            image.InitAlpha()
+        images[f.stem] = image
+
+    positions, (width, height) = pack({n: (i.GetWidth(), i.GetHeight()) for n, i in images.items()}, padding)
+
+    sheet = wx.Image(max(width, 1), max(height, 1), clear=True)
+    sheet.InitAlpha()
+    sheet.SetAlpha(bytes(sheet.GetWidth() * sheet.GetHeight()))
+
+    sprites = {}
+    for name, (x, y) in positions.items():
+        image = images[name]
+        sheet.Paste(image, x, y)
+        sprites[name] = [x, y, image.GetWidth(), image.GetHeight()]
+
+    output = Path(output)
+    if not sheet.SaveFile(str(output), wx.BITMAP_TYPE_PNG):
+        raise IOError('%s could not be written' % output)
+
+    index_file(output).write_text(json.dumps({
+        'format': ATLAS_FORMAT,
+        'image': output.name,
+        'sprites': sprites,
+    }, indent=1, sort_keys=True))
+
+    return sprites
+
+
+def read_index(image : Path) -> Dict[str, List[int]]:
+    """
+        Returns the position and size of each icon in the atlas image
+    """
+    index = json.loads(index_file(image).read_text())
+    if index.get('format') != ATLAS_FORMAT:
+        raise ValueError('%s was made by a different version of wxml, pack it again' % index_file(image))
+    return index['sprites']
+
+
+def main(argv : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m wxml atlas', description='Pack a directory of icons into an atlas image')
+    parser.add_argument('directory', type=Path, help='Directory of icons')
+    parser.add_argument('--output', '-o', type=Path, default=None, help='Atlas image to write, <directory>.png by default')
+    parser.add_argument('--padding', '-p', type=int, default=1, help='Pixels between icons')
+    opts = parser.parse_args(argv)
+
+    files = find_images(opts.directory)
+    if not files:
+        print('no images found')
+        return 1
+
+    output = opts.output or opts.directory.resolve().with_suffix('.png')
+
+    # image handlers are set up with the app
+    app = wx.App(False) if wx.App.Get() is None else None
+
+    try:
+        sprites = build_atlas(files, output, padding=opts.padding)
+    except (IOError, ValueError) as ex:
+        print('failed: %s' % ex, file=sys.stderr)
+        return 1
+    finally:
+        del app
+
+    print('packed %d icons -> %s, %s' % (len(sprites), output, index_file(output).name))
+    return 0
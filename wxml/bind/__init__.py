@@ -2,16 +2,23 @@ from pathlib import Path
 import sys
 import os
 import json
+import collections
+import contextlib
+import heapq
+import itertools
+import concurrent.futures
 from typing import List, Dict, Optional, Callable, Type, Any, Union
 import enum
 
 import wx
 import threading
 
+import wxml.decorators
 from wxml.decorators import invoke_ui, block_ui
 import wxml.builder
 from wxml.event import Event
 from wxml.attr import nested_getattr, nested_hasattr
+from wxml.cache import LruCache, MISSING
 
 DEBUG_UPDATE = False
 DEBUG_STORE = False
@@ -81,6 +88,22 @@ class BindSource(object):
 
         return value
 
+def freeze(value : Any) -> Any:
+    """
+        Hashable stand-in for lists, dicts and sets, for keying on bind values.
+        The type is kept, so a list and a tuple, or a dict and a list of pairs,
+        with the same contents are different keys. Dicts are keyed without
+        their order, as they compare equal regardless of it.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(freeze(v) for v in value))
+    elif isinstance(value, dict):
+        return (type(value), frozenset((k, freeze(v)) for k, v in value.items()))
+    elif isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(value))
+    return value
+
+
 class DataStore:
     """
         Handler for serializing/deserializing persisted data.
@@ -141,6 +164,148 @@ class DataStore:
 
         return val
 
+class Propagation(object):
+    """
+        DynamicValues waiting to be recomputed, ordered by rank, so each is
+        recomputed once and only after everything it depends on.
+
+        Only used on the UI thread, where targets are updated.
+    """
+    queue = []
+    queued = set()
+    # more than zero while targets are being updated
+    sending = 0
+    _order = itertools.count()
+
+    recomputes = 0
+    coalesced = 0
+
+    @classmethod
+    def mark(cls, dynamic_value : 'DynamicValue') -> None:
+        if dynamic_value in cls.queued:
+            cls.coalesced += 1
+            return
+
+        cls.queued.add(dynamic_value)
+        heapq.heappush(cls.queue, (dynamic_value.rank, next(cls._order), dynamic_value))
+
+    @classmethod
+    def drain(cls) -> None:
+        while cls.queue:
+            _, _, dynamic_value = heapq.heappop(cls.queue)
+            cls.queued.discard(dynamic_value)
+            cls.recomputes += 1
+            dynamic_value.recompute()
+
+    @classmethod
+    @contextlib.contextmanager
+    def hold(cls):
+        """
+            DynamicValues marked inside are left in the queue
+        """
+        cls.sending += 1
+        try:
+            yield
+        finally:
+            cls.sending -= 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        return {
+            'recomputes': cls.recomputes,
+            'coalesced': cls.coalesced,
+            'queued': len(cls.queue),
+        }
+
+
+class BindBatch(object):
+    """
+        Bind values changed while a batch is open on this thread, see batch().
+    """
+    _local = threading.local()
+
+    def __init__(self):
+        self.depth = 0
+        # changed bind value -> the widget that changed it, None if several did
+        self.changed = collections.OrderedDict()
+        # values touched, which are sent out even when set back to where they were
+        self.touched = set()
+
+    @classmethod
+    def current(cls) -> Optional['BindBatch']:
+        current = getattr(cls._local, 'batch', None)
+        if current is not None and current.depth:
+            return current
+        return None
+
+    @classmethod
+    def open(cls) -> 'BindBatch':
+        current = getattr(cls._local, 'batch', None)
+        if current is None:
+            current = cls._local.batch = cls()
+        current.depth += 1
+        return current
+
+    def close(self) -> None:
+        try:
+            if self.depth == 1:
+                self.flush()
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.changed.clear()
+                self.touched.clear()
+
+    def mark(self, bind_value : 'BindValue', source=None, touched=True) -> None:
+        if bind_value in self.changed and self.changed[bind_value] is not source:
+            source = None
+        self.changed[bind_value] = source
+        if touched:
+            self.touched.add(bind_value)
+
+    @block_ui
+    def flush(self) -> None:
+        """
+            Updates the targets of every changed value once. DynamicValues
+            depending on them are recomputed once all changed values have been
+            sent out, and after_changed fires last. Values changed by that are
+            sent out in the same way. Values set back to what they were before
+            the batch are left out, unless they were also touched.
+        """
+        while self.changed:
+            changed = [
+                (bind_value, source) for bind_value, source in self.changed.items()
+                if bind_value in self.touched or bind_value._value != bind_value._previous
+            ]
+            self.changed.clear()
+            self.touched.clear()
+
+            with Propagation.hold():
+                for bind_value, source in changed:
+                    bind_value.send(source)
+
+            Propagation.drain()
+
+            for bind_value, _ in changed:
+                bind_value.after_changed(bind_value._value)
+
+
+@contextlib.contextmanager
+def batch():
+    """
+        Holds back updates of the bind values set inside it, until the outermost
+        batch exits. Then each changed value updates its targets once with its
+        final value, and the DynamicValues depending on them are recomputed once.
+
+        Can also be used as a decorator.
+    """
+    current = BindBatch.open()
+    try:
+        yield current
+    finally:
+        current.close()
+
+
 class BindValueSerializer(object):
     def serialize(self, value):
         raise NotImplementedError('implement serialize in child')
@@ -150,6 +315,9 @@ class BindValueSerializer(object):
 
 
 class BindValue(object):
+    # DynamicValues rank above everything they depend on
+    rank = 0
+
     def __init__(self,
                  value : Any,
                  name : Optional[str] = None,
@@ -252,7 +420,7 @@ class BindValue(object):
         if all:
             self.touch_all()
         else:
-            self.update_target()
+            self._changed()
 
     def touch_all(self):
         """
@@ -275,8 +443,18 @@ class BindValue(object):
 
         self.value_set(new)
         if self._value != new:
-            self._previous = self._value
+            current = BindBatch.current()
+            # keep the value from before the batch
+            if current is None or self not in current.changed:
+                self._previous = self._value
             self._value = new
+            self._changed(source, touched=False)
+
+    def _changed(self, source=None, touched=True):
+        current = BindBatch.current()
+        if current is not None:
+            current.mark(self, source, touched)
+        else:
             self.update_target(source=source)
 
     @value.setter
@@ -287,10 +465,19 @@ class BindValue(object):
     def update_target(self, source=None):
         """
             Fires the value_changed event, updates all targets (except the source),
-            and then fires the after_changed event.
+            recomputes the DynamicValues depending on this, and then fires the
+            after_changed event.
 
             This will always be invoked on the UI thread.
         """
+        with Propagation.hold():
+            self.send(source)
+
+        Propagation.drain()
+
+        self.after_changed(self._value)
+
+    def send(self, source=None):
         self.value_changed(self._value)
 
         if DEBUG_UPDATE or self._trace:
@@ -302,8 +489,6 @@ class BindValue(object):
             if target.obj != source:
                 target(self._value)
 
-        self.after_changed(self._value)
-
 
 class ArrayBindValue(BindValue):
     def __init__(self,
@@ -374,39 +559,288 @@ class DynamicValue(BindValue):
         Creating a DynamicValue without a update method will always cause
         targets to be updated. This can be used as a way to group together
         bind values to be listened to.
+
+        A lazy DynamicValue is only computed when its value is read, or when
+        it changes while something needs its value: a target other than
+        another lazy DynamicValue, or a value_changed or after_changed handler.
+
+        With memoize, the results for the last memoize combinations of the
+        listeners' values (or of what key returns) are kept, and update is
+        only called for combinations that are not. When update reads anything
+        other than the listeners' values, key must return that as well. Without
+        listeners or key, nothing is memoized.
     """
     def __init__(self,
                  *listeners : List[BindValue],
                  update : Callable[[], None] = None,
                  default : Optional[Any] = '',
                  name : Optional[str] = None,
-                 trace = False):
-        super().__init__(default, serialize=False, name=name, trace=trace)
-        self.action = update or self._noop
+                 trace = False,
+                 lazy = False,
+                 memoize : int = 0,
+                 key : Optional[Callable[[], Any]] = None):
+        listened = []
         for l in listeners:
             if isinstance(l, BindValue):
-                l.add_target(self, self.update)
+                listened.append(l)
 
             # also subscribe to any bind values contained in this listener
+            unlistened = getattr(l, 'unlistened', ())
             for k, v in l.__dict__.items():
-                if isinstance(v, BindValue):
-                    v.add_target(self, self.update)
+                if isinstance(v, BindValue) and k not in unlistened:
+                    listened.append(v)
+
+        # set first, bind values made by the base classes depend on this
+        self.rank = 1 + max((l.rank for l in listened), default=0)
+        self.recomputes = 0
+        self.lazy = lazy
+        self._stale = False
+        self._invalidating = False
+        self.listened = listened
+        self.memo = LruCache(maxsize=memoize, name=name) if memoize else None
+        self.memo_key = key
+
+        super().__init__(default, serialize=False, name=name, trace=trace)
+        self.action = update or self._noop
+        for l in listened:
+            l.add_target(self, self.update)
+
+        if lazy:
+            self._stale = True
+        else:
+            self.recompute()
 
-        self.update()
+    @property
+    def value(self):
+        if self._stale:
+            self.pull()
+        return self._value
+
+    @value.setter
+    def value(self, new):
+        self._set(new)
 
     def _noop(self, changed=None):
         return not self._value
 
+    def needed(self) -> bool:
+        """
+            True when something other than lazy DynamicValues uses the value
+        """
+        if self.value_changed or self.after_changed:
+            return True
+        return any(not self.lazy_target(t) for t in self.targets)
+
+    @staticmethod
+    def lazy_target(target : BindTarget) -> bool:
+        return isinstance(target.obj, DynamicValue) and target.obj.lazy and target.attr == target.obj.update
+
+    def invalidate(self):
+        """
+            Marks the value to be computed when next read, along with the
+            lazy DynamicValues depending on it. Those are told even when this
+            is already stale, as they may have been computed since.
+        """
+        if self._invalidating:
+            return
+
+        self._stale = True
+        self._invalidating = True
+        try:
+            for target in list(self.targets):
+                if self.lazy_target(target):
+                    target.obj.update()
+        finally:
+            self._invalidating = False
+
+    def pull(self):
+        """
+            Computes a stale value when it is read, nothing needs to be told
+        """
+        value = self.compute()
+        self._stale = False
+        self.recomputes += 1
+        self._previous = self._value
+        self._value = value
+
+    def send(self, source=None):
+        # touched while stale
+        if self._stale:
+            self.pull()
+        super().send(source)
+
     def update(self, changed=None):
-        value = self.action()
+        """
+            Recomputes the value, once whatever else it depends on that is
+            being updated has been recomputed.
+        """
+        if self.lazy and not self.needed():
+            self.invalidate()
+            return
+
+        if not wx.IsMainThread():
+            self.recompute()
+            return
+
+        Propagation.mark(self)
+        if not Propagation.sending:
+            Propagation.drain()
+
+    def recompute(self):
+        self._stale = False
+        self.recomputes += 1
+        value = self.compute()
         self.value = value
 
+    def compute(self):
+        """
+            Calls update, unless the result for the current inputs is memoized
+        """
+        key = self.current_key()
+        if key is MISSING:
+            return self.action()
+
+        value = self.memo.get(key, MISSING)
+        if value is MISSING:
+            value = self.action()
+            self.memo.put(key, value)
+        return value
+
+    def current_key(self):
+        """
+            Memo key for the current inputs, MISSING when they are not memoized
+        """
+        if self.memo is None or (self.memo_key is None and not self.listened):
+            # only touched or pushed, the inputs are unknown
+            return MISSING
+
+        try:
+            if self.memo_key is not None:
+                key = self.memo_key()
+            else:
+                key = tuple(freeze(l.value) for l in self.listened)
+            hash(key)
+        except TypeError:
+            # unhashable inputs are not memoized
+            return MISSING
+
+        return key
+
     def push_event(self, event):
         value = self.action(event)
         self._value = value
         self.update_target()
 
 
+class BackgroundDynamicValue(DynamicValue):
+    """
+        DynamicValue whose update method runs in a shared thread pool, keeping
+        the current value until it is done. When the inputs change while it
+        is running, the newer computation wins, and the older result is
+        dropped (or never started). is_computing is True while it runs.
+
+        update must not change widgets, and should only read bind values.
+    """
+    max_workers = None
+    _pool = None
+
+    # is_computing is about the computation, not the value, so values
+    # listening to this one are not updated when it changes
+    unlistened = frozenset(['_computing'])
+
+    def __init__(self, *listeners : List[BindValue], **kwargs):
+        # set first, DynamicValue starts computing
+        self._computing = BindValue(False)
+        self._generation = 0
+        self._future = None
+        self._lock = threading.Lock()
+        super().__init__(*listeners, **kwargs)
+
+    @property
+    def is_computing(self) -> BindValue:
+        return self._computing
+
+    @classmethod
+    def pool(cls) -> concurrent.futures.ThreadPoolExecutor:
+        if BackgroundDynamicValue._pool is None:
+            BackgroundDynamicValue._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=cls.max_workers,
+                thread_name_prefix='wxml-dynamic'
+            )
+        return BackgroundDynamicValue._pool
+
+    def pull(self):
+        # reading never waits, the value is set once computed
+        self.recompute()
+
+    def _supersede(self) -> int:
+        """
+            Drops the computation that is running, returns the generation of the next one
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            future, self._future = self._future, None
+
+        # outside the lock, cancelling runs the done callback
+        if future is not None:
+            future.cancel()
+        return generation
+
+    def cancel(self):
+        """
+            Drops the computation that is running, keeping the current value
+        """
+        self._supersede()
+        self._computing.value = False
+
+    def recompute(self):
+        self._stale = False
+        self.recomputes += 1
+
+        generation = self._supersede()
+
+        key = self.current_key()
+        if key is not MISSING:
+            value = self.memo.get(key, MISSING)
+            if value is not MISSING:
+                self._computing.value = False
+                self.value = value
+                return
+
+        self._computing.value = True
+
+        future = self.pool().submit(self.action)
+        with self._lock:
+            if generation == self._generation:
+                self._future = future
+        future.add_done_callback(lambda f: wx.CallAfter(self._finish, generation, key, f))
+
+    def _finish(self, generation, key, future):
+        with self._lock:
+            if generation != self._generation:
+                # superseded
+                return
+            self._future = None
+
+        if future.cancelled():
+            return
+
+        ex = future.exception()
+        if ex is not None:
+            self._computing.value = False
+            wxml.decorators.background.handler(ex, (type(ex), ex, ex.__traceback__))
+            return
+
+        value = future.result()
+        if key is not MISSING:
+            self.memo.put(key, value)
+
+        with batch():
+            self._computing.value = False
+            self.value = value
+
+
 class DynamicArrayBindValue(DynamicValue, ArrayBindValue):
     """
         listeners: list of BindValue's that will cause this to update
@@ -6,10 +6,11 @@ import collections
 import importlib
 import sys
 import ast
+import builtins
 import functools
 import threading
 import re
-from typing import NamedTuple, Optional, Union
+from typing import Any, Dict, NamedTuple, Optional, Union
 import traceback
 import logging
 import enum
@@ -21,6 +22,9 @@ from wxml.decorators import invoke_ui, block_ui
 import wxml.bind as bind
 from wxml.utils import ImgGroup, Resources, IconGroup, IconBundleGroup
 from wxml.attr import nested_getattr, nested_hasattr
+from wxml.cache import FontCache, LruCache, ImportWatcher, MISSING
+from wxml.plan import BuildPlan, classify_attributes, parse_binding
+from wxml.compiler import GeneratedView
 
 DEBUG_EVAL = False
 DEBUG_ATTR = False
@@ -33,6 +37,13 @@ DEBUG_EVENT = False
 
 AutoImportedPackages = set()
 
+_IMMUTABLE_TYPES = (str, bytes, int, float, complex, bool, type(None), range, frozenset)
+
+def is_immutable(value):
+    if isinstance(value, tuple):
+        return all(is_immutable(v) for v in value)
+    return isinstance(value, _IMMUTABLE_TYPES)
+
 def full_class_path(class_type: type):
     module = '' if class_type.__module__ == "__main__" else '%s.' % class_type.__module__
     return '%s%s' % (module, class_type.__qualname__)
@@ -50,8 +61,108 @@ def clone_element(element : ET.Element) -> ET.Element:
         new_element.append(clone_element(child))
     return new_element
 
+def copy_element(element : ET.Element, attrib : Optional[Dict[str, str]] = None, exclude=()) -> ET.Element:
+    """
+        Shallow copy of element with attributes added or removed, the children
+        are shared. Parsed trees are shared between builds, so use this instead
+        of modifying a node's attributes.
+    """
+    new_element = ET.Element(element.tag, {k: v for k, v in element.attrib.items() if k not in exclude})
+    new_element.attrib.update(attrib or {})
+    new_element.extend(element)
+    return new_element
+
+class ComponentTemplate(object):
+    """
+        Xml component expanded once when it is registered. Each use only
+        adds its own attributes, and its children at the ChildParent node.
+    """
+
+    def __init__(self, custom_obj):
+        ctor = custom_obj._ctor
+
+        self.overrides = custom_obj._overrides
+        self.root = ET.Element('CustomWx', {
+            '_class': ctor.tag,
+            '_passthru': custom_obj._type.name,
+            **ctor.attrib
+        })
+        self.root.extend(ctor)
+        self.child_path = self.find_child_parent(self.root) or ()
+        self.plan = BuildPlan.compile(self.root)
+
+    @classmethod
+    def find_child_parent(cls, element : ET.Element, path=()) -> Optional[tuple]:
+        for index, child in enumerate(element):
+            if child.attrib.get('ChildParent', 'False').lower() in ('', 'true'):
+                return path + (index,)
+            found = cls.find_child_parent(child, path + (index,))
+            if found is not None:
+                return found
+        return None
+
+    def instantiate(self, node : ET.Element) -> ET.Element:
+        """
+            Returns the component's tree for node, only the nodes leading
+            to the ChildParent node are copied when node has children.
+        """
+        attrib = {k: v for k, v in node.attrib.items() if k not in self.overrides}
+        root = copy_element(self.root, attrib) if attrib or len(node) else self.root
+
+        if len(node):
+            parent_node = root
+            for index in self.child_path:
+                parent_node[index] = copy_element(parent_node[index])
+                parent_node = parent_node[index]
+            parent_node.extend(node)
+
+        return root
+
+class Registry(dict):
+    """
+        dict that fires the changed event with the key of an entry that was
+        added, replaced by a different object or removed, so caches built
+        from its contents know which of their entries to discard.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed = Event('changed')
+
+    def __setitem__(self, key, value):
+        previous = self.get(key, MISSING)
+        super().__setitem__(key, value)
+        if previous is not value:
+            self.changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.changed(key)
+
+    def pop(self, key, *args):
+        present = key in self
+        value = super().pop(key, *args)
+        if present:
+            self.changed(key)
+        return value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        for key in keys:
+            self.changed(key)
+
 class Ui(object):
-    Registry = {}
+    Registry = Registry()
     _imported = set()
 
     def __init__(self, view_name: Union[str, os.PathLike]):
@@ -77,8 +188,321 @@ class Ui(object):
 
         return class_obj
 
+class RepeatRow(object):
+    """
+        Widgets built for one item of a Repeat node. Events of the widgets are
+        set on the row, instead of the view, and so are those of Lazy nodes in
+        the row once they are built.
+    """
+
+    def __init__(self, item, builder, items):
+        self.item = item
+        self.builder = builder
+        # sizer items, with the (proportion, flag, border) they were added with
+        self.items = items
+        self.widgets = {}
+        self.models = {}
+
+    def unbind(self):
+        """
+            Removes the row's widgets from the bind values they were bound to
+        """
+        widgets = set(self.builder.debug_names)
+
+        for binding in self.builder.values_to_update:
+            binding.targets = [t for t in binding.targets if t.obj not in widgets]
+            for obj in widgets.intersection(binding.sources):
+                del binding.sources[obj]
+
+    def dispose(self, sizer):
+        self.unbind()
+
+        for obj, _ in self.items:
+            sizer.Detach(obj)
+            if isinstance(obj, wx.Window):
+                obj.Destroy()
+
+class Repeater(object):
+    """
+        Keeps the rows of a Repeat node in step with its items. When the items
+        change, rows are only built, destroyed or moved where their key changed.
+    """
+
+    def __init__(self, builder, node, host, params):
+        self.builder = builder
+        self.node = node
+        self.host = host
+        self.params = params
+        self.styles = builder.styles
+
+        self.key = node.attrib.get('Key')
+        self.item_name = node.attrib.get('Item', 'item')
+        self.rows = {}
+        self.order = []
+        self.source = None
+
+    def watch(self, source):
+        """
+            Follows changes of source until the host window is destroyed
+        """
+        self.source = source
+        source.add_target(self, self.update)
+        self.host.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+
+    def on_destroy(self, evt):
+        evt.Skip()
+        # the event also comes up from the rows' widgets
+        if evt.GetEventObject() is not self.host:
+            return
+
+        if self.source is not None:
+            self.source.targets = [t for t in self.source.targets if t.obj is not self]
+            self.source = None
+
+        for row in self.rows.values():
+            row.unbind()
+        self.rows.clear()
+        self.order = []
+
+    def key_of(self, item):
+        if self.key is None:
+            return item
+        elif isinstance(item, dict):
+            return item.get(self.key)
+        return nested_getattr(self.key, item)
+
+    def keys(self, items):
+        """
+            Keys of the items, repeated keys are numbered so each stays unique
+        """
+        seen = collections.Counter()
+        keys = []
+        for item in items:
+            key = self.key_of(item)
+            keys.append((key, seen[key]))
+            seen[key] += 1
+        return keys
+
+    @staticmethod
+    def stable(positions):
+        """
+            Indices of the longest increasing run of positions, these rows
+            keep their place while the others are moved around them.
+        """
+        tails = []
+        previous = [None] * len(positions)
+        for i, position in enumerate(positions):
+            lo, hi = 0, len(tails)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if positions[tails[mid]] < position:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            previous[i] = tails[lo - 1] if lo else None
+            if lo == len(tails):
+                tails.append(i)
+            else:
+                tails[lo] = i
+
+        result = set()
+        i = tails[-1] if tails else None
+        while i is not None:
+            result.add(i)
+            i = previous[i]
+        return result
+
+    def update(self, items):
+        items = list(items or [])
+        keys = self.keys(items)
+        sizer = self.host.Sizer
+
+        self.host.Freeze()
+        try:
+            wanted = set(keys)
+            for key in self.order:
+                if key not in wanted:
+                    self.rows.pop(key).dispose(sizer)
+
+            old_positions = {key: i for i, key in enumerate(k for k in self.order if k in wanted)}
+
+            # rows whose item was replaced are built again
+            for key, item in zip(keys, items):
+                row = self.rows.get(key)
+                if row is not None and row.item is not item and row.item != item:
+                    row.dispose(sizer)
+                    del self.rows[key]
+                    del old_positions[key]
+
+            kept = [i for i, key in enumerate(keys) if key in old_positions]
+            stable = {kept[i] for i in self.stable([old_positions[keys[i]] for i in kept])}
+
+            for i, key in enumerate(keys):
+                if key in self.rows and i not in stable:
+                    for obj, _ in self.rows[key].items:
+                        sizer.Detach(obj)
+
+            position = 0
+            for i, (key, item) in enumerate(zip(keys, items)):
+                row = self.rows.get(key)
+                if row is None:
+                    row = self.rows[key] = self.build_row(item)
+                if i not in stable:
+                    for offset, (obj, flags) in enumerate(row.items):
+                        sizer.Insert(position + offset, obj, *flags)
+                position += len(row.items)
+
+            self.order = keys
+            self.host.Layout()
+        finally:
+            self.host.Thaw()
+
+        Control.layout_later(self.host.GetParent())
+
+    def build_row(self, item):
+        sizer = self.host.Sizer
+        count = sizer.GetItemCount()
+
+        builder = UiBuilder(str(self.builder.filename) + '[Repeat]', xml=self.builder.xml)
+        builder.init_build(self.builder.view_model)
+        builder.plan = self.builder.plan
+        builder.controller = self.builder.controller
+        builder.styles = self.styles
+        builder.overrides = dict(getattr(self.builder, 'overrides', {}), **{self.item_name: item})
+
+        for child in self.node:
+            try:
+                builder.compile(child, self.host, dict(self.params))
+            except Exception:
+                # already in construction_errors
+                pass
+
+        # take the new sizer items out, they are inserted at the row's position
+        added = []
+        for sizer_item in list(sizer.GetChildren())[count:]:
+            obj = sizer_item.GetWindow() or sizer_item.GetSizer()
+            added.append((obj, (sizer_item.GetProportion(), sizer_item.GetFlag(), sizer_item.GetBorder())))
+        for obj, _ in added:
+            sizer.Detach(obj)
+
+        row = RepeatRow(item, builder, added)
+
+        for widget, events in builder.events.items():
+            if widget is not None:
+                builder.build_widget_events(row, widget, events)
+
+        # only this row's targets need the current value
+        builder.prime_targets()
+
+        builder.start_lazy(row)
+
+        if builder.construction_errors and hasattr(builder.view_model, 'report_errors'):
+            builder.view_model.report_errors(builder.construction_errors)
+
+        return row
+
+class ControlRecipe(object):
+    """
+        What a Control class is built from, prepared on its first use: the
+        Xml of the component with the same name, and the plan for its nodes.
+    """
+
+    def __init__(self, class_obj):
+        self.ctor = getattr(class_obj, '_ctor', None)
+        self.root = self.ctor if self.ctor is not None else ET.Element('Fake')
+        self.plan = BuildPlan.compile(self.root)
+
+    @classmethod
+    def get(cls, class_obj) -> 'ControlRecipe':
+        recipe = Control.recipes.get(class_obj)
+        # registering the component again replaces its Xml
+        if recipe is None or recipe.ctor is not getattr(class_obj, '_ctor', None):
+            recipe = Control.recipes[class_obj] = cls(class_obj)
+        return recipe
+
+class LayoutBatch(object):
+    """
+        Layout requested while a view is built, done in one pass once the
+        build is finished. The parent, or else the first window built, is
+        frozen until then. Views included while building join the batch.
+    """
+
+    active = None
+
+    def __init__(self):
+        self.frozen = None
+        self.windows = {}
+        self.requests = 0
+        self.depth = 0
+
+    @classmethod
+    def begin(cls, window=None) -> 'LayoutBatch':
+        batch = cls.active
+        if batch is None:
+            batch = cls.active = cls()
+            batch.freeze(window)
+        batch.depth += 1
+        return batch
+
+    def end(self):
+        self.depth -= 1
+        if self.depth == 0:
+            LayoutBatch.active = None
+            try:
+                self.run()
+            finally:
+                if self.frozen:
+                    self.frozen.Thaw()
+
+    def freeze(self, window):
+        if self.frozen is None and isinstance(window, wx.Window):
+            window.Freeze()
+            self.frozen = window
+
+    @classmethod
+    def layout(cls, window, fit=False):
+        """
+            Lays out window, or fits it to its sizer, when the current build
+            is finished. Outside of a build, it is done right away.
+        """
+        if cls.active is not None:
+            cls.active.add(window, fit)
+        elif fit:
+            window.SetSizerAndFit(window.Sizer)
+        else:
+            window.Layout()
+
+    def add(self, window, fit=False):
+        self.requests += 1
+        self.windows[window] = self.windows.get(window, False) or fit
+
+    def run(self):
+        start = time.perf_counter()
+
+        # children were requested before their parents, so they are done first
+        for window, fit in self.windows.items():
+            if not window or window.Sizer is None:
+                continue
+            if fit:
+                window.SetSizerAndFit(window.Sizer)
+            else:
+                window.Layout()
+
+        if DEBUG_TIME and self.windows:
+            elapsed = time.perf_counter() - start
+            print('layout: %d requests, %d windows in %.2f ms (%.2f ms saved)' % (
+                self.requests,
+                len(self.windows),
+                elapsed * 1000,
+                (self.requests - len(self.windows)) * elapsed * 1000 / len(self.windows)
+            ))
+
 class Control(object):
-    Registry = {}
+    Registry = Registry()
+    recipes = {}
+
+    # windows that will be laid out once the current event is handled
+    _pending_layout = {}
 
     def __init__(self, class_obj):
         self._path = full_class_path(class_obj)
@@ -87,14 +511,13 @@ class Control(object):
 
     def __call__(self, parent, *args, auto_sizer=True, **kwargs):
         # see if there is XML associated with this class
-        ctor = getattr(self._class_obj, '_ctor', None)
+        recipe = ControlRecipe.get(self._class_obj)
+        ctor = recipe.root
 
         builder = UiBuilder(self._class_obj.__name__)
         builder._view_model_is_root = True
         builder.init_build(None)
-
-        if ctor is None:
-            ctor = ET.Element('Fake')
+        builder.plan = recipe.plan
 
         obj = builder.wx_node(
             ctor,
@@ -111,14 +534,38 @@ class Control(object):
 
         builder.post_build(obj)
 
-        if parent.Sizer is not None:
-            parent.Layout()
+        Control.layout_later(parent)
 
         if hasattr(obj, 'ready'):
             obj.ready()
 
         return obj
 
+    @staticmethod
+    def layout_later(window):
+        """
+            Lays out window after the current event has been handled, so
+            creating many controls in one handler results in one Layout.
+            While a view is being built, it is part of the build's layout pass.
+        """
+        if LayoutBatch.active is not None:
+            LayoutBatch.active.add(window)
+            return
+
+        if not Control._pending_layout:
+            wx.CallAfter(Control._layout_pending)
+        Control._pending_layout[window] = None
+
+    @staticmethod
+    def _layout_pending():
+        pending = list(Control._pending_layout)
+        Control._pending_layout.clear()
+
+        for window in pending:
+            # skip windows destroyed in the meantime
+            if window and window.Sizer is not None:
+                window.Layout()
+
     def __str__(self):
         return '<%s(%s) object at 0x%x>' % (
             full_class_path(self.__class__),
@@ -126,29 +573,135 @@ class Control(object):
             id(self)
         )
 
-def wx_getattr(value):
-    if hasattr(wx, value):
-        return getattr(wx, value)
+class WxNamespace(object):
+    """
+        Index of the names in wx and every imported wx module, used to look
+        up attribute strings and to evaluate those that are not literals.
+
+        wx takes precedence, followed by the wx modules in import order.
+        The index is built on first use, and modules imported later are
+        merged in as they show up in sys.modules. Names that are not in the
+        index are looked up in the modules again, for attributes set after
+        a module was merged; names not found there either are remembered
+        until more modules are imported. Compiled expressions are kept, so
+        evaluating the same string again skips the compile.
+    """
 
-    for name, mod in sys.modules.items():
-        if name.startswith('wx.') and hasattr(mod, value):
-            return getattr(mod, value)
+    def __init__(self):
+        self.code = LruCache(maxsize=1024, name='expressions')
+        self._imports = ImportWatcher()
+        self._modules = []
+        self._merged = set()
+        self._namespace = None
+        self._globals = None
+        # names not in any module, until more modules are imported
+        self._missing = set()
+
+    @property
+    def namespace(self):
+        if self._namespace is None:
+            self._namespace = {'wx': wx}
+            self._modules.append(wx)
+            self._merge()
+        elif self._imports.changed():
+            self._missing.clear()
+            self._merge()
+        return self._namespace
+
+    def _merge(self):
+        # importing a submodule also adds it as an attribute of wx
+        self._add(vars(wx))
+
+        for name in list(sys.modules):
+            if name.startswith('wx.') and name not in self._merged:
+                mod = sys.modules.get(name)
+                if mod is None:
+                    continue
+                self._merged.add(name)
+                self._modules.append(mod)
+                self._add(vars(mod))
+
+    def _add(self, names):
+        for k, v in names.items():
+            if not k.startswith('__'):
+                self._namespace.setdefault(k, v)
+        self._globals = None
+
+    def lookup(self, name):
+        value = self.namespace.get(name)
+        if value is None and not name.startswith('__') and name not in self._missing:
+            # the module may have been merged while it was still being imported
+            for mod in self._modules:
+                value = getattr(mod, name, None)
+                if value is not None:
+                    self._namespace[name] = value
+                    if self._globals is not None:
+                        self._globals[name] = value
+                    break
+            else:
+                self._missing.add(name)
+        return value
 
-    if value in UiBuilder.components:
-        return UiBuilder.components[value]
+    def evaluate(self, value):
+        """
+            Evaluates value as an expression in the merged namespace.
+            Raises SyntaxError if it is not an expression, and whatever
+            evaluating it raises otherwise.
+        """
+        code = self.code.get(value, MISSING)
+        if code is MISSING:
+            try:
+                code = compile('(%s)' % value, '<wxml>', 'eval')
+            except SyntaxError:
+                code = None
+            self.code.put(value, code)
 
-    if value in Control.Registry:
-        return Control.Registry[value]
+        if code is None:
+            raise SyntaxError('not an expression: %s' % value)
+
+        namespace = self.namespace
+        if self._globals is None:
+            # eval adds __builtins__ to its globals, which must not show up in lookups
+            self._globals = dict(namespace, __builtins__=builtins)
+
+        return eval(code, self._globals)
+
+wx_namespace = WxNamespace()
+
+def wx_getattr(value):
+    obj = wx_namespace.lookup(value)
+    if obj is not None:
+        return obj
+
+    # registries are plain dicts, so they are checked directly to stay current
+    obj = UiBuilder.components.get(value)
+    if obj is not None:
+        return obj
+
+    return Control.Registry.get(value)
 
 def wx_hasattr(value):
     return wx_getattr(value) is not None
 
 class NodeRegistry(dict):
+    """
+        Maps node tags to the UiBuilder method that handles them. Tags without
+        a named handler are run through the filters in order, and the result
+        is remembered per dispatch_key until the tag is registered again or
+        modules are imported.
+    """
+
     def __init__(self):
         super().__init__()
         self['names'] = {}
         self['filters'] = []
 
+        self.dispatch = {}
+        self.dispatched = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+        self._imports = ImportWatcher()
+
     def node(self, *names):
         def wraps(func):
             for name in names:
@@ -159,35 +712,138 @@ class NodeRegistry(dict):
     def filter(self, callable):
         def wraps(func):
             self['filters'].append((callable, func))
+            self.invalidate()
             return func
         return wraps
 
+    @staticmethod
+    def dispatch_key(node):
+        # everything the filters look at
+        return node.tag, node.attrib.get('AutoImport', 'false').lower() == 'true'
+
+    def invalidate(self, name=None):
+        """
+            Forgets the filter results for tag name, or all of them
+        """
+        if name is None:
+            self.dispatch.clear()
+        else:
+            for key in [k for k in self.dispatch if k[0] == name]:
+                del self.dispatch[key]
+
     def action_for(self, node):
-        if node.tag in self['names']:
-            return self['names'][node.tag]
+        action = self['names'].get(node.tag)
+
+        if action is None:
+            if self._imports.changed():
+                self.invalidate()
+
+            key = self.dispatch_key(node)
+            action = self.dispatch.get(key, MISSING)
+            if action is MISSING:
+                self.misses += 1
+                for _is, f in self['filters']:
+                    if _is(node):
+                        action = f
+                        break
+                else:
+                    action = None
+                self.dispatch[key] = action
+            else:
+                self.hits += 1
 
-        for _is, f in self['filters']:
-            if _is(node):
-                return f
+        if action is not None:
+            self.dispatched[action.__name__] += 1
+
+        return action
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.dispatch),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'dispatched': dict(self.dispatched),
+        }
 
 
 Node = NodeRegistry()
 NodePost = NodeRegistry()
 
+class StyleSheet(object):
+    """
+        Evaluated arguments of a Styles block by tag, on top of those of the
+        enclosing Styles blocks. A style applies to its tag, and to every class
+        derived from the class of that name, so Control styles apply to Buttons.
+    """
+
+    def __init__(self, styles : Optional[Dict[str, Dict[str, Any]]] = None, parent : Optional['StyleSheet'] = None):
+        self.styles = {tag: dict(args) for tag, args in parent.styles.items()} if parent is not None else {}
+        for tag, args in (styles or {}).items():
+            self.styles.setdefault(tag, {}).update(args)
+
+        # merged arguments by (class, tag)
+        self._resolved = {}
+
+    def resolve(self, class_obj, tag : str) -> Dict[str, Any]:
+        """
+            Arguments for tag, from the most general class to the tag itself.
+            The result is shared and must not be modified.
+        """
+        key = (class_obj, tag)
+        args = self._resolved.get(key)
+        if args is None:
+            args = {}
+            if self.styles:
+                names = [c.__name__ for c in reversed(getattr(class_obj, '__mro__', ()))]
+                for name in names + [tag]:
+                    args.update(self.styles.get(name, {}))
+            self._resolved[key] = args
+        return args
+
+
+class CompiledFlags(NamedTuple):
+    """
+        Arguments for adding a widget to a sizer, either as a SizerFlags
+        value, or as keyword arguments when a flag has no SizerFlags method.
+    """
+    flags : Optional[wx.SizerFlags]
+    kwargs : Dict[str, Any]
+    # merged flag attributes, for explaining errors
+    args : Dict[str, Any]
+
+
 class UiBuilder(object):
     """
         Handles processing an Xml file that will be turned into an interface.
     """
 
-    components = {}
+    components = Registry()
     debug_names = {}
     counter = collections.defaultdict(lambda: 0)
 
+    # results of str2py that do not depend on the view model, overrides
+    # or loop variables, keyed by (value, not_a_class, bare_class)
+    resolve_cache = LruCache(maxsize=4096, name='str2py')
+    _resolve_imports = ImportWatcher()
+
+    # fonts made by Font and FontInfo nodes, shared across views
+    font_cache = FontCache(maxsize=256)
+
+    # styles of the node being compiled, see push_styles
+    styles = StyleSheet()
+
+    # CompiledFlags keyed by the sizer class and the evaluated default,
+    # style and node flags
+    sizer_flag_cache = LruCache(maxsize=1024, name='sizer_flags')
+
     # actions that run when the builder is created
     _queued = []
 
-    def __init__(self, filename, loader=False):
+    def __init__(self, filename, loader=False, xml=None):
         self.filename = filename
+        self.xml = xml
         self._view_model_is_root = False
         self._loader = loader
 
@@ -206,9 +862,15 @@ class UiBuilder(object):
         self.loop_vars = {}
         self.construction_errors = []
         self.values_to_update = []
+        # (binding, target) for every target this builder added
+        self.new_targets = []
         self.controller = '__main__'
 
         self.menu_ids = {}
+        self.plan = None
+        self.lazy = []
+        self.built = None
+        self.styles = StyleSheet()
 
         # try and run queued actions
         if not self._loader:
@@ -242,20 +904,156 @@ class UiBuilder(object):
 
         UiBuilder.debug_names.update(self.debug_names)
 
+        self.start_lazy(obj)
+
+    def start_lazy(self, obj):
+        """
+            Builds the Lazy nodes that are already shown, the others are
+            built when their event fires.
+        """
+        self.built = obj
+        for shown, build_now in self.lazy:
+            if shown():
+                build_now()
+
+    def prime_targets(self):
+        """
+            Sets the current value of each binding on the targets this
+            builder added, and nothing else bound to it.
+        """
+        for binding, target in self.new_targets:
+            target(binding.value)
+
     def build(self, view_model, parent=None, sizer_flags=None):
         self.init_build(view_model)
 
+        batch = LayoutBatch.begin(parent)
+        try:
+            return self.build_view(parent, sizer_flags)
+        finally:
+            batch.end()
+
+    def build_progressive(self, view_model, parent=None, sizer_flags=None, progress=None, done=None, budget=0.008):
+        """
+            Builds the view in chunks of about budget seconds, the first right
+            away and the others from wx.CallAfter, so the view can be shown and
+            stays responsive while it is built. Returns the top-level object once
+            the first chunk is done.
+
+            progress is set to the fraction of nodes built, and done(obj, failed)
+            is called after the last chunk, once the view has been post built.
+            failed is True when a node raised, which stops the build: the nodes
+            built so far are post built, the rest of the view is not built and
+            the exception is in construction_errors.
+        """
+        progress = progress if progress is not None else bind.BindValue(0.0)
+        done = done or (lambda obj, failed: None)
+
+        if self.xml is None and GeneratedView.load(self.filename) is not None:
+            obj = self.build(view_model, parent, sizer_flags)
+            progress.value = 1.0
+            done(obj, False)
+            return obj
+
+        self.init_build(view_model)
+
+        try:
+            self.plan = BuildPlan.load(self.filename, self.xml)
+        except Exception as ex:
+            self.construction_errors.append([ex, 'PARSE', None, traceback.format_exc()])
+            done(None, True)
+            return None
+
+        root = self.plan.root
+        if sizer_flags:
+            root = copy_element(root, sizer_flags)
+
+        self.controller = self.plan.controller
+
+        batch = LayoutBatch.begin(parent)
+        try:
+            head = self.compile_node(root, parent)
+        finally:
+            batch.end()
+
+        if head is None:
+            obj = getattr(self, 'constructed')
+            self.post_build(obj)
+            progress.value = 1.0
+            done(obj, False)
+            return obj
+
+        obj, params = head
+        steps = self.step_body(root, obj, parent, params)
+        total = len(self.plan.nodes)
+        state = {'nodes': 1, 'chunks': 0}
+
+        def chunk():
+            # closed before it was done
+            if not obj:
+                return
+
+            more = False
+            failed = False
+            state['chunks'] += 1
+            errors = len(self.construction_errors)
+
+            batch = LayoutBatch.begin(obj)
+            try:
+                end = time.perf_counter() + budget
+                for count in steps:
+                    state['nodes'] += count
+                    if time.perf_counter() >= end:
+                        more = True
+                        break
+            except Exception as ex:
+                # the steps can not go on after raising
+                failed = True
+                if DEBUG_ERROR:
+                    print('ERROR', '[%s]' % self.filename, 'build stopped after %d of %d nodes:' % (state['nodes'], total), ex)
+                if len(self.construction_errors) == errors:
+                    self.construction_errors.append([ex, 'PROGRESSIVE', obj, traceback.format_exc()])
+            finally:
+                batch.end()
+
+            if more:
+                progress.value = state['nodes'] / total
+                wx.CallAfter(chunk)
+                return
+
+            batch = LayoutBatch.begin(obj)
+            try:
+                self.post_build(obj)
+            finally:
+                batch.end()
+
+            if DEBUG_TIME:
+                print('%s built in %d chunks' % (self.filename, state['chunks']))
+
+            progress.value = state['nodes'] / total if failed else 1.0
+            done(obj, failed)
+
+        chunk()
+
+        return obj
+
+    def build_view(self, parent=None, sizer_flags=None):
+        generated = GeneratedView.load(self.filename) if self.xml is None else None
+        if generated is not None:
+            return self.build_generated(generated, parent, sizer_flags)
+
         try:
-            tree = ET.parse(self.filename)
+            self.plan = BuildPlan.load(self.filename, self.xml)
         except Exception as ex:
             import traceback
             self.construction_errors.append([ex, 'PARSE', None, traceback.format_exc()])
             return None
 
-        root = tree.getroot()
-        root.attrib.update(sizer_flags or {})
+        root = self.plan.root
+        if sizer_flags:
+            root = copy_element(root, sizer_flags)
 
-        self.controller = root.attrib.pop('Controller', '__main__')
+        self.controller = self.plan.controller
 
         obj = UiBuilder.compile(self, root, parent)
         if obj is None:
@@ -265,9 +1063,34 @@ class UiBuilder(object):
 
         return obj
 
+    def build_generated(self, module, parent=None, sizer_flags=None):
+        """
+            Builds the view with the module generated by `python -m wxml compile`
+        """
+        self.controller = module.CONTROLLER
+
+        errors = len(self.construction_errors)
+        try:
+            obj = module.build(self, parent, {}, sizer_flags or {})
+        except Exception as ex:
+            if len(self.construction_errors) == errors:
+                self.construction_errors.append([ex, 'GENERATED', parent, traceback.format_exc()])
+            raise
+
+        if obj is None:
+            obj = getattr(self, 'constructed')
+
+        self.post_build(obj)
+
+        return obj
+
     def build_widget_events(self, obj, widget, events):
-        widget_name = self.debug_names[widget]
-        setattr(obj, widget_name, widget)
+        if widget is obj and widget not in self.debug_names:
+            # events of menu items, for a view made by another builder
+            widget_name = None
+        else:
+            widget_name = self.debug_names[widget]
+            setattr(obj, widget_name, widget)
 
         for (event, func, *evt_obj) in events:
             event_type = wx_getattr(event)
@@ -316,14 +1139,11 @@ class UiBuilder(object):
         retval = value
         resolved = 'str'
 
-        bind_expr = r'^\(([_A-Za-z0-9\.]+)(?:\[([_A-Za-z0-9\.-]+)\])?(?:\:(EVT_[A-Z_]+)(?:\[([_A-Za-z0-9\.]+)\])?)?\)$'
-        tokens = re.search(bind_expr, value)
+        tokens = parse_binding(value)
 
         # one or two way binding
         if not_a_class and tokens is not None:
-            key = tokens.group(1)
-            to_widget = tokens.group(2)
-            event = tokens.group(3)
+            key, to_widget, event, from_widget = tokens
             event = None if event is None else wx_getattr(event)
 
             transform = None
@@ -353,7 +1173,6 @@ class UiBuilder(object):
                 if not isinstance(transform, bind.Transformer):
                     transform = bind.ToWidgetGenericTransformer(None, transform)
 
-            from_widget = tokens.group(4)
             if from_widget is not None:
                 receiver = self.str2py(from_widget, bare_class=True)
                 if not isinstance(receiver, bind.Transformer):
@@ -444,6 +1263,24 @@ class UiBuilder(object):
                         print('   Raw="{0}" ResolveType={1} Value={2} Class={3}'.format(value, resolved, obj, obj.__class__.__name__))
                     return obj
 
+        if UiBuilder._resolve_imports.changed():
+            UiBuilder.resolve_cache.clear()
+
+        # nothing below depends on the view model, overrides or loop
+        # variables, so the outcome can be reused for this value
+        cache_key = (value, not_a_class, bare_class)
+        cached = UiBuilder.resolve_cache.get(cache_key, MISSING)
+        if cached is not MISSING:
+            resolved, retval = cached
+            if resolved == 'ModuleMember(again)':
+                # module attributes can be rebound, so only the lookup is cached
+                retval = nested_getattr(value, default=None)
+                if retval is None:
+                    retval = value
+            if DEBUG_EVAL:
+                print('   Raw="{0}" ResolveType={1}(cached) Value={2} Class={3}'.format(value, resolved, retval, retval.__class__.__name__))
+            return retval
+
         wx_value = wx_getattr(value)
         if not_a_class and wx_value is not None:
             retval = wx_value
@@ -454,19 +1291,11 @@ class UiBuilder(object):
                 resolved = 'literal'
             except (SyntaxError, ValueError):
                 if not_a_class:
-                    for name, mod in sys.modules.items():
-                        if name.startswith('wx.'):
-                            context = {k: getattr(mod, k) for k in dir(mod)}
-                            ns = {}
-                            cmd = 'var_value = (%s)' % (value)
-
-                            try:
-                                exec(cmd, context, ns)
-                                retval = ns['var_value']
-                                resolved = '%s attr' % mod.__name__
-                                break
-                            except Exception as ex:
-                                pass
+                    try:
+                        retval = wx_namespace.evaluate(value)
+                        resolved = 'wx expression'
+                    except Exception as ex:
+                        pass
 
         # last chance, look again at imported modules if this might be something
         if not_a_class and (resolved == 'str' and '.' in value):
@@ -474,12 +1303,17 @@ class UiBuilder(object):
             retval = nested_getattr(value, default=None)
             if retval is not None:
                 resolved = 'ModuleMember(again)'
+                UiBuilder.resolve_cache.put(cache_key, (resolved, None))
                 if DEBUG_EVAL:
                     print('   Raw="{0}" ResolveType={1} Value={2} Class={3}'.format(value, resolved, retval, retval.__class__.__name__))
                 return retval
             else:
                 retval = orig
 
+        # objects created by evaluating an expression are not shared between widgets
+        if resolved == 'wx attr' or is_immutable(retval):
+            UiBuilder.resolve_cache.put(cache_key, (resolved, retval))
+
         if DEBUG_EVAL:
             print('   Raw="{0}" ResolveType={1} Value={2} Class={3}'.format(value, resolved, retval, retval.__class__.__name__))
 
@@ -523,6 +1357,20 @@ class UiBuilder(object):
         return args, kwargs
 
     def compile(self, node, parent=None, params=None, inject=None):
+        head = self.compile_node(node, parent, params, inject)
+        if head is None:
+            return
+
+        parent_obj, params = head
+        self.compile_body(node, parent_obj, parent, params)
+
+        return parent_obj
+
+    def compile_node(self, node, parent=None, params=None, inject=None):
+        """
+            Runs the action for node. Returns the object and params its children
+            are compiled with, or None when they are not compiled.
+        """
         action = Node.action_for(node)
 
         if DEBUG_COMPILE:
@@ -552,9 +1400,63 @@ class UiBuilder(object):
         if inject is not None:
             parent_obj.__dict__.update(inject)
 
-        for child in node:
-            obj = self.compile(child, parent_obj, params=params)
+        if LayoutBatch.active is not None:
+            LayoutBatch.active.freeze(parent_obj)
+
+        return parent_obj, params
+
+    def is_lazy(self, node, parent_obj):
+        return node.attrib.get('Lazy', 'false').lower() == 'true' and isinstance(parent_obj, wx.Window)
+
+    def compile_body(self, node, parent_obj, parent, params):
+        if self.is_lazy(node, parent_obj):
+            self.defer_children(node, parent_obj, parent, dict(params))
+        else:
+            self.compile_children(node, parent_obj, parent, params)
+
+    def compile_children(self, node, parent_obj, parent, params):
+        styles = self.styles
+        try:
+            for child in node:
+                self.compile(child, parent_obj, params=params)
+        finally:
+            # Styles only apply to the rest of the node they are in
+            self.styles = styles
+
+        self.compile_post(node, parent_obj, parent, params)
 
+    def step_body(self, node, parent_obj, parent, params):
+        """
+            Generator that does what compile_body does, yielding the number
+            of nodes compiled after each child. Children with children of
+            their own are stepped through as well.
+        """
+        if self.is_lazy(node, parent_obj):
+            self.defer_children(node, parent_obj, parent, dict(params))
+            yield len(node.findall('.//*'))
+            return
+
+        styles = self.styles
+        try:
+            for child in node:
+                head = self.compile_node(child, parent_obj, params)
+                if head is None:
+                    yield len(child.findall('.//*')) + 1
+                elif len(child):
+                    yield 1
+                    yield from self.step_body(child, head[0], parent_obj, head[1])
+                else:
+                    self.compile_body(child, head[0], parent_obj, head[1])
+                    yield 1
+
+                if isinstance(parent_obj, wx.Window):
+                    LayoutBatch.layout(parent_obj)
+        finally:
+            self.styles = styles
+
+        self.compile_post(node, parent_obj, parent, params)
+
+    def compile_post(self, node, parent_obj, parent, params):
         post_action = NodePost.action_for(node)
         if post_action is not None:
             try:
@@ -566,7 +1468,142 @@ class UiBuilder(object):
                     print('ERROR', '[%s.post]' % node.tag, '[parent: %s]' % parent, 'exception:', ex)
                 self.construction_errors.append([ex, node.tag + '.post', parent, traceback.format_exc()])
 
-        return parent_obj
+    def lazy_trigger(self, obj, parent):
+        """
+            Returns the window and event that tell when obj is first shown,
+            and a function that tells if it is shown now.
+        """
+        adv = sys.modules.get('wx.adv')
+
+        if isinstance(obj, wx.CollapsiblePane):
+            return obj, wx.EVT_COLLAPSIBLEPANE_CHANGED, lambda: not obj.IsCollapsed()
+        elif isinstance(parent, wx.BookCtrlBase):
+            return parent, wx.EVT_BOOKCTRL_PAGE_CHANGED, lambda: parent.GetCurrentPage() is obj
+        elif adv is not None and isinstance(parent, adv.Wizard):
+            return parent, adv.EVT_WIZARD_PAGE_CHANGED, lambda: parent.GetCurrentPage() is obj
+        else:
+            return obj, wx.EVT_SHOW, obj.IsShown
+
+    def defer_children(self, node, obj, parent, params):
+        """
+            Lazy="true": the children of node are compiled once obj is selected
+            in a book control or wizard, expanded, or shown.
+        """
+        window, event, shown = self.lazy_trigger(obj, parent)
+        styles = self.styles
+        state = {'built': False, 'building': False}
+
+        def build_now():
+            if state['built'] or state['building']:
+                return
+
+            state['building'] = True
+            try:
+                self.build_lazy(node, obj, parent, params, styles)
+            finally:
+                state['building'] = False
+
+            # only once it worked, otherwise the next event tries again
+            state['built'] = True
+            window.Unbind(event, handler=on_event)
+
+        def on_event(evt):
+            evt.Skip()
+            # selecting a page in Config fires while the view is being built,
+            # start_lazy builds the nodes that are shown once it is done
+            if self.built is None:
+                return
+            if shown():
+                build_now()
+
+        window.Bind(event, on_event)
+        self.lazy.append((shown, build_now))
+
+        if DEBUG_COMPILE:
+            print(' %s.%s deferred until shown' % (Path(self.filename).stem, node.tag))
+
+    def build_lazy(self, node, obj, parent, params, styles=None):
+        """
+            Compiles the children of a Lazy node, and wires up their events and
+            bindings the way the rest of the view was.
+        """
+        start = time.perf_counter()
+
+        view = self.built
+        builder = UiBuilder(self.filename, xml=self.xml)
+        builder.init_build(self.view_model)
+        builder.plan = self.plan
+        builder.controller = self.controller
+        builder.styles = styles or self.styles
+        if hasattr(self, 'overrides'):
+            builder.overrides = self.overrides
+
+        batch = LayoutBatch.begin(obj)
+        try:
+            self.compile_lazy(builder, node, obj, parent, params, view)
+        finally:
+            batch.end()
+
+        if DEBUG_TIME:
+            print('%s lazy construction time for %s: %.2f seconds' % (
+                self.filename, self.debug_names.get(obj, node.tag), time.perf_counter() - start
+            ))
+
+        if builder.construction_errors and hasattr(self.view_model, 'report_errors'):
+            self.view_model.report_errors(builder.construction_errors)
+
+    def compile_lazy(self, builder, node, obj, parent, params, view):
+        """
+            The part of build_lazy that runs while obj is frozen
+        """
+        known = set(view.__dict__)
+
+        try:
+            builder.compile_children(node, obj, parent, params)
+        except Exception:
+            # already in construction_errors
+            pass
+
+        for widget, name in builder.debug_names.items():
+            view.widgets[name] = widget
+        view.models.update(builder.models)
+
+        for widget, events in builder.events.items():
+            builder.build_widget_events(view, widget if widget is not None else view, events)
+
+        # subscribe the view model to the new events, like ViewModel.build
+        for name, event in list(view.__dict__.items()):
+            if name not in known and isinstance(event, Event) and hasattr(self.view_model, name):
+                event += getattr(self.view_model, name)
+
+        # only the new targets need the current value, touching the values
+        # would update everything bound to them across the view
+        builder.prime_targets()
+
+        # so a Repeat row disposes of the bindings of its Lazy nodes too
+        self.values_to_update.extend(v for v in builder.values_to_update if v not in self.values_to_update)
+        self.debug_names.update(builder.debug_names)
+        self.children.update(builder.children)
+
+        if obj.Sizer is not None:
+            LayoutBatch.layout(obj)
+
+        builder.start_lazy(view)
+
+    def post_node(self, tag, obj, params):
+        """
+            Runs the post action for a node that was constructed without
+            going through compile.
+        """
+        post_action = NodePost['names'][tag]
+        try:
+            if DEBUG_COMPILE:
+                print(' %s.%s (post)' % (Path(self.filename).stem, tag), '->', post_action.__name__)
+            post_action(self, None, obj, params)
+        except Exception as ex:
+            if DEBUG_ERROR:
+                print('ERROR', '[%s.post]' % tag, 'exception:', ex)
+            self.construction_errors.append([ex, tag + '.post', None, traceback.format_exc()])
 
     @Node.node('Bitmaps')
     def images(self, node, parent, params):
@@ -624,21 +1661,15 @@ class UiBuilder(object):
     @Node.filter(lambda n: n.tag in Control.Registry and n.tag in UiBuilder.components)
     def wx_custom_control_with_xml(self, node, parent=None, params=None, root=wx, tag=None):
         class_obj = Control.Registry[node.tag]
-        ctor = class_obj._ctor
+        recipe = ControlRecipe.get(class_obj)
 
         builder = UiBuilder(class_obj.__name__)
         builder._view_model_is_root = True
         builder.init_build(None)
+        builder.plan = recipe.plan
 
-        use_node = ET.Element(node.tag)
-        use_node.attrib.update(ctor.attrib)
-        use_node.attrib.update(node.attrib)
-
-        for c in ctor:
-            use_node.append(clone_element(c))
-
-        for child in node:
-            use_node.append(clone_element(child))
+        use_node = copy_element(recipe.root, node.attrib)
+        use_node.extend(node)
 
         obj = builder.wx_node(use_node, parent, params, actual_obj=class_obj)
         for c in use_node:
@@ -647,6 +1678,7 @@ class UiBuilder(object):
         builder.post_build(obj)
 
         self.values_to_update.extend(builder.values_to_update)
+        self.new_targets.extend(builder.new_targets)
 
         var_name = node.attrib.get('Name', '%s_%d' % (tag or node.tag, self.counter[class_obj]))
         self.counter[class_obj] += 1
@@ -660,58 +1692,34 @@ class UiBuilder(object):
 
     @Node.filter(lambda n: n.tag in UiBuilder.components)
     def create_component(self, node, parent, params):
-        obj = UiBuilder.components[node.tag]
-        true_node = obj._ctor
-        overrides = obj._overrides
-
-        use_node = ET.Element('CustomWx')
-        use_node.attrib['_class'] = node.tag
-        use_node.attrib['_passthru'] = obj._type.name
-        use_node.attrib.update(true_node.attrib)
-
-        use_node.attrib.update({
-            k: v
-            for k, v in node.attrib.items()
-            if k not in obj._overrides
-        })
-
-        for c in true_node:
-            use_node.append(clone_element(c))
-
-        parent_nodes = use_node.findall('.//*[@ChildParent]')
-        for p in parent_nodes:
-            if p.attrib.get('ChildParent', 'False').lower() in ('', 'true'):
-                parent_node = p
-                break
-        else:
-            parent_node = use_node
-
-        for child in node:
-            parent_node.append(clone_element(child))
+        template = UiBuilder.components[node.tag]._template
+        use_node = template.instantiate(node)
 
         this_overrides = getattr(self, 'overrides', {})
 
         build_overrides = {}
 
-        for name, default in overrides.items():
+        for name, default in template.overrides.items():
             # pass down current overrides to the child
             if name in this_overrides:
                 build_overrides[name] = this_overrides[name]
             else:
-                val = self.str2py(node.attrib.get(name, overrides.get(name, default or '')))
+                value = node.attrib.get(name, default or '')
+                val = self.str2py(value)
                 # if this is a string, we should try and convert it
-                if isinstance(val, str):
-                    build_overrides[name] = self.str2py(val)
-                else:
-                    build_overrides[name] = val
+                if isinstance(val, str) and val != value:
+                    val = self.str2py(val)
+                build_overrides[name] = val
 
         builder = UiBuilder(str(self.filename) + '[%s]' % node.tag)
         builder.init_build(self.view_model)
+        builder.plan = template.plan
         builder.overrides = build_overrides
         obj = builder.compile(use_node, parent, params)
         builder.post_build(obj)
 
         self.values_to_update.extend(builder.values_to_update)
+        self.new_targets.extend(builder.new_targets)
 
         self.models.update(builder.models)
         self.debug_names.update(builder.debug_names)
@@ -885,6 +1893,7 @@ class UiBuilder(object):
 
         if to_widget:
             binding.add_target(parent, attr_name, transform=transformer, arguments=arguments)
+            self.new_targets.append((binding, binding.targets[-1]))
         if from_widget:
             binding.add_source(parent, event, attr_name, transform=receiver, bind_to=bind_to)
 
@@ -1001,16 +2010,21 @@ class UiBuilder(object):
     @Node.filter(lambda n: hasattr(wx, n.tag) and issubclass(getattr(wx, n.tag), wx.Sizer))
     def wx_create_sizer(self, node, parent, params):
         class_obj = nested_getattr(node.tag, root=wx)
-        kwargs = self.eval_args(node.attrib, exclude=self.SizerFlags(class_obj))
-
-        this_obj = class_obj(**kwargs)
+        return self.create_sizer(class_obj, node.tag, parent, self.eval_args(node.attrib))
 
-        sizer_flags = self.eval_args(node.attrib, only_args=self.SizerFlags(class_obj))
+    def create_sizer(self, class_obj, tag, parent, attrs):
+        """
+            Constructs the sizer from its evaluated attributes and sets it to
+            the parent. Sizer flag attributes become the default flags for
+            widgets added to it.
+        """
+        flags = self.SizerFlags(class_obj)
+        this_obj = class_obj(**{k: v for k, v in attrs.items() if k not in flags})
 
-        this_obj.default_flags = sizer_flags
+        this_obj.default_flags = {k: attrs[k] for k in flags if k in attrs}
         parent.SetSizer(this_obj)
 
-        var_name = '%s_%d' % (node.tag, self.counter[class_obj])
+        var_name = '%s_%d' % (tag, self.counter[class_obj])
         self.counter[class_obj] += 1
         self.debug_names[this_obj] = var_name
 
@@ -1018,12 +2032,67 @@ class UiBuilder(object):
 
     @Node.node('CustomWx')
     def wx_custom(self, node, parent, params):
-        if node.attrib.pop('_passthru') == CustomNodeType.PassParent.name:
+        if node.attrib['_passthru'] == CustomNodeType.PassParent.name:
             return parent
         else:
-            new_obj = self.wx_node(node, parent, params, tag=node.attrib.pop('_class'))
+            new_obj = self.wx_node(
+                copy_element(node, exclude=('_passthru', '_class')),
+                parent,
+                params,
+                tag=node.attrib['_class']
+            )
             return new_obj
 
+    def compile_sizer_flags(self, sizer_class, default_flags, widget_args, overrides) -> CompiledFlags:
+        """
+            Merges the sizer's default flags with the style and node flags, and
+            turns them into the arguments for Sizer.Add. Every distinct combination
+            is compiled once, so rows of identical widgets share the same flags.
+        """
+        try:
+            key = (
+                sizer_class,
+                tuple(default_flags.items()),
+                tuple(widget_args.items()),
+                tuple(overrides.items())
+            )
+            hash(key)
+        except TypeError:
+            key = None
+
+        if key is not None:
+            compiled = self.sizer_flag_cache.get(key)
+            if compiled is not None:
+                return compiled
+
+        sizer_args = dict(default_flags)
+        sizer_args.update(widget_args)
+        sizer_args.update(overrides)
+
+        # shaped wins over proportion
+        self.adjust_sizer_flags(default_flags, sizer_args, 'Shaped', 'Proportion')
+        self.adjust_sizer_flags(default_flags, sizer_args, 'Expand', 'Center')
+
+        if all(hasattr(wx.SizerFlags, f) for f in sizer_args):
+            s = wx.SizerFlags()
+            for key_name, value in sizer_args.items():
+                f = getattr(s, key_name)
+
+                if key_name in self.ARGLESS_SIZER:
+                    # empty tuple, backwards compat '' -> ()
+                    if value == () or value:
+                        s = f()
+                else:
+                    arg = [value] if not isinstance(value, (tuple, list)) else value
+                    s = f(*arg)
+            compiled = CompiledFlags(s, {}, sizer_args)
+        else:
+            compiled = CompiledFlags(None, {k.lower(): v for k, v in sizer_args.items()}, sizer_args)
+
+        if key is not None:
+            self.sizer_flag_cache.put(key, compiled)
+        return compiled
+
     def adjust_sizer_flags(self, default, args, key1, key2):
         if default.get(key1, False) in self.SIZER_TRUE and args.get(key2, False) in self.SIZER_TRUE:
             args.pop(key1, None)
@@ -1034,8 +2103,6 @@ class UiBuilder(object):
     @Node.filter(lambda n: hasattr(wx, n.tag))
     def wx_node(self, node, parent=None, params=None, root=wx, tag=None, actual_obj=None,
                 parentless=False, skip_sizer=False, extra_args=None, extra_kwargs=None):
-        params = params or {}
-
         if actual_obj is not None:
             class_obj = actual_obj
         else:
@@ -1046,14 +2113,37 @@ class UiBuilder(object):
         if class_obj is None:
             raise Exception('wx object [%s] could not be found' % (tag or node.tag))
 
-        style_args = getattr(self, 'style_args', {}).get(tag or node.tag, {})
+        node_plan = self.node_plan(node)
 
-        args = self.eval_args(style_args, exclude=self.SizerFlags(parent) + ['Name', 'ChildParent'])
-        args.update(self.eval_args(
-            node.attrib,
-            excl_prefix=['Config.', 'EventBindings.', 'Font.', 'FontInfo.'],
-            exclude=self.SizerFlags(parent) + ['Name', 'ChildParent']
-        ))
+        return self.create_widget(
+            class_obj,
+            tag or node.tag,
+            parent,
+            params,
+            self.eval_args(node_plan.attrib, exclude=['Name', 'ChildParent', 'Lazy']),
+            name=node.attrib.get('Name'),
+            node_plan=node_plan,
+            parentless=parentless,
+            skip_sizer=skip_sizer,
+            extra_args=extra_args,
+            extra_kwargs=extra_kwargs
+        )
+
+    def create_widget(self, class_obj, tag, parent, params, attrs, name=None, node_plan=None,
+                      parentless=False, skip_sizer=False, extra_args=None, extra_kwargs=None):
+        """
+            Constructs class_obj from the evaluated attributes of its node, adds it
+            to the parent's sizer, and applies the attribute shortcuts in node_plan.
+
+            Views compiled with `python -m wxml compile` call this directly.
+        """
+        params = params or {}
+
+        style_args = self.styles.resolve(class_obj, tag)
+        parent_flags = self.SizerFlags(parent)
+
+        args = {k: v for k, v in style_args.items() if k not in parent_flags and k not in ('Name', 'ChildParent')}
+        args.update({k: v for k, v in attrs.items() if k not in parent_flags})
 
         bindings = {
             k: v
@@ -1082,114 +2172,89 @@ class UiBuilder(object):
         if hasattr(this_obj, 'SetDoubleBuffered'):
             this_obj.SetDoubleBuffered(True)
 
-        for name, (binding, event, transform, receiver) in bindings.items():
+        for key, (binding, event, transform, receiver) in bindings.items():
             self.binding_hook(
                 binding,
                 this_obj,
-                name.title(),
+                key.title(),
                 event=event,
                 transformer=transform,
                 receiver=receiver,
                 bind_to=params.get('bind-to')
             )
 
-        var_name = node.attrib.get('Name', '%s_%d' % (tag or node.tag, self.counter[class_obj]))
+        var_name = name if name is not None else '%s_%d' % (tag, self.counter[class_obj])
         self.counter[class_obj] += 1
         self.debug_names[this_obj] = var_name
         self.children[var_name] = this_obj
         this_obj.Name = var_name
 
         if not skip_sizer and parent is not None and getattr(parent, 'Sizer', None) is not None:
-            default_flags = getattr(parent.Sizer, 'default_flags', {})
-            sizer_args = {k: v for k, v in default_flags.items()}
-            widget_args = self.eval_args(style_args, only_args=self.SizerFlags(parent.Sizer))
-            overrides = self.eval_args(node.attrib, only_args=self.SizerFlags(parent.Sizer))
-            sizer_args.update(widget_args)
-            sizer_args.update(overrides)
-
-            # shaped wins over proportion
-            self.adjust_sizer_flags(default_flags, sizer_args, 'Shaped', 'Proportion')
-            self.adjust_sizer_flags(default_flags, sizer_args, 'Expand', 'Center')
-
-            if all(hasattr(wx.SizerFlags, f) for f in sizer_args):
-                s = wx.SizerFlags()
-                for key, value in sizer_args.items():
-                    f = getattr(s, key)
-
-                    if key in self.ARGLESS_SIZER:
-                        # empty tuple, backwards compat '' -> ()
-                        if value == () or value:
-                            s = f()
-                    else:
-                        arg = [value] if not isinstance(value, (tuple, list)) else value
-                        s = f(*arg)
-                try:
-                    parent.Sizer.Add(this_obj, s)
-                except wx._core.wxAssertionError as ex:
-                    flags = self.explain_sizer_args(sizer_args)
-                    flags.append('')
-                    flags.append(traceback.format_exc())
-                    self.construction_errors.append([ex, node.tag, None, '\n'.join(flags)])
-            else:
-                try:
-                    parent.Sizer.Add(this_obj, **{k.lower(): v for k, v in sizer_args.items()})
-                except wx._core.wxAssertionError as ex:
-                    flags = self.explain_sizer_args(sizer_args)
-                    flags.append('')
-                    flags.append(traceback.format_exc())
-                    self.construction_errors.append([ex, node.tag, None, '\n'.join(flags)])
+            sizer = parent.Sizer
+            sizer_flags = self.SizerFlags(sizer)
+            compiled = self.compile_sizer_flags(
+                sizer.__class__,
+                getattr(sizer, 'default_flags', {}),
+                {k: style_args[k] for k in sizer_flags if k in style_args},
+                {k: attrs[k] for k in sizer_flags if k in attrs}
+            )
+
+            try:
+                if compiled.flags is not None:
+                    sizer.Add(this_obj, compiled.flags)
+                else:
+                    sizer.Add(this_obj, **compiled.kwargs)
+            except wx._core.wxAssertionError as ex:
+                flags = self.explain_sizer_args(compiled.args)
+                flags.append('')
+                flags.append(traceback.format_exc())
+                self.construction_errors.append([ex, tag, None, '\n'.join(flags)])
+
+        if node_plan is None:
+            return this_obj
+
         # Config. attributes
-        auto_config = ET.Element('Config')
-        idx = len('Config.')
-        for k in node.attrib:
-            if k.startswith('Config.'):
-                elem = k[idx:]
+        if node_plan.config:
+            auto_config = ET.Element('Config')
+            for elem, value in node_plan.config:
                 elem_node = ET.Element(elem)
-                elem_node.attrib['value'] = node.attrib[k]
+                elem_node.attrib['value'] = value
                 auto_config.append(elem_node)
-        self.setup_parent(auto_config, this_obj, params)
+            self.setup_parent(auto_config, this_obj, params)
 
         # EventBindings. attributes
-        auto_config = ET.Element('EventBindings')
-        idx = len('EventBindings.')
-        for k in node.attrib:
-            if k.startswith('EventBindings.'):
-                elem = k[idx:]
+        if node_plan.events:
+            auto_config = ET.Element('EventBindings')
+            for elem, value in node_plan.events:
                 elem_node = ET.Element(elem)
-                elem_node.attrib['handler'] = node.attrib[k]
+                elem_node.attrib['handler'] = value
                 auto_config.append(elem_node)
-        if auto_config:
             self.set_up_events(auto_config, this_obj, params)
 
-        font_config = ET.Element('Font')
-        idx = len('Font.')
-        for k in node.attrib:
-            if k.startswith('Font.'):
-                elem = k[idx:]
-                elem_node = ET.Element(elem)
-                if node.attrib[k] != '':
-                    elem_node.attrib[0] = node.attrib[k]
-                font_config.append(elem_node)
-        if font_config:
-            self.modify_font(font_config, this_obj, params)
-
-        font_info_config = ET.Element('FontInfo')
-        idx = len('FontInfo.')
-        for k in node.attrib:
-            if k.startswith('FontInfo.'):
-                elem = k[idx:]
-                if elem in ('pointSize', 'pixelSize'):
-                    font_info_config.attrib[elem] = node.attrib[k]
-                else:
-                    elem_node = ET.Element(elem)
-                    if node.attrib[k] != '':
-                        elem_node.attrib[0] = node.attrib[k]
-                    font_info_config.append(elem_node)
-        if font_info_config:
-            self.wx_font_setup(font_info_config, this_obj, params)
+        if node_plan.font:
+            self.apply_font(this_obj, [self.font_step(elem, {0: value} if value != '' else {}) for elem, value in node_plan.font])
+
+        if node_plan.font_info:
+            size = {k: v for k, v in node_plan.font_info if k in ('pointSize', 'pixelSize')}
+            steps = [
+                self.font_step(elem, {0: value} if value != '' else {})
+                for elem, value in node_plan.font_info
+                if elem not in size and elem in self.FONT_INFO_ATTRIBUTES
+            ]
+            self.apply_font_info(this_obj, self.eval_args(size), steps)
 
         return this_obj
 
+    def node_plan(self, node):
+        """
+            Returns the classified attributes of the node, from the build plan
+            when the node is part of it.
+        """
+        node_plan = self.plan.node(node) if self.plan is not None else None
+        if node_plan is None:
+            node_plan = classify_attributes(node.attrib)
+        return node_plan
+
     def explain_sizer_args(self, args):
         flags = ['Sizer Flags:']
         for k, v in args.items():
@@ -1274,20 +2339,7 @@ class UiBuilder(object):
         """
             modifies the parent object's Font property
         """
-
-        font = parent.Font
-        for child in node:
-            func = getattr(font, child.tag)
-            if callable(func):
-                args, kwargs = self.eval_args_kwargs(child.attrib)
-                retval = func(*args, **kwargs)
-                if isinstance(retval, wx.Font):
-                    font = retval
-            else:
-                args = self.eval_args(child.attrib, only_args=['value'])
-                setattr(font, child.tag, args['value'])
-
-        parent.Font = font
+        self.apply_font(parent, [self.font_step(child.tag, child.attrib) for child in node])
 
     @Node.node('FontInfo')
     def wx_font_setup(self, node, parent, params):
@@ -1296,23 +2348,70 @@ class UiBuilder(object):
             constructs a new Font object that is assigned to the
             parent object
         """
+        steps = [
+            self.font_step(child.tag, child.attrib)
+            for child in node
+            if child.tag in self.FONT_INFO_ATTRIBUTES
+        ]
+        self.apply_font_info(parent, self.eval_args(node.attrib), steps)
+
+    def font_step(self, name, attrib):
+        """
+            A method to call (or property to set) on a font, with its evaluated arguments
+        """
+        args, kwargs = self.eval_args_kwargs(attrib)
+        return name, tuple(args), tuple(kwargs.items())
+
+    def cached_font(self, key, make):
+        """
+            Returns the interned font for key, calling make() to create it
+            the first time. Fonts described by unhashable values are not kept.
+        """
+        try:
+            font = self.font_cache.get(key)
+        except TypeError:
+            return make()
+
+        if font is None:
+            font = self.font_cache.put(key, make())
+        return font
+
+    def apply_font(self, parent, steps):
+        def make():
+            font = base
+            for name, args, kwargs in steps:
+                func = getattr(font, name)
+                if callable(func):
+                    retval = func(*args, **dict(kwargs))
+                    if isinstance(retval, wx.Font):
+                        font = retval
+                else:
+                    setattr(font, name, dict(kwargs).get('value', args[0] if args else None))
+            return font
 
-        args = self.eval_args(node.attrib)
-        if 'pointSize' in args:
-            info = wx.FontInfo(args['pointSize'])
-        elif 'pixelSize' in args:
-            info = xw.FontInfo(args['pixelSize'])
+        base = parent.Font
+        description = FontCache.describe(base)
+        if description is None:
+            parent.Font = make()
         else:
-            info = wx.FontInfo()
+            parent.Font = self.cached_font(('Font', description, tuple(steps)), make)
+
+    def apply_font_info(self, parent, size, steps):
+        def make():
+            if 'pointSize' in size:
+                info = wx.FontInfo(size['pointSize'])
+            elif 'pixelSize' in size:
+                info = wx.FontInfo(size['pixelSize'])
+            else:
+                info = wx.FontInfo()
 
-        for child in node:
-            if child.tag in self.FONT_INFO_ATTRIBUTES:
-                args, kwargs = self.eval_args_kwargs(child.attrib)
-                info = getattr(info, child.tag)(*args, **kwargs)
+            for name, args, kwargs in steps:
+                info = getattr(info, name)(*args, **dict(kwargs))
+            return wx.Font(info)
 
         font_setter = getattr(parent, 'SetFont', None)
         if font_setter is not None:
-            font_setter(wx.Font(info))
+            font_setter(self.cached_font(('FontInfo', tuple(size.items()), tuple(steps)), make))
 
     @Node.filter(lambda n: n.tag.startswith('wx.'))
     def wx_import_node(self, node, parent, params):
@@ -1323,7 +2422,7 @@ class UiBuilder(object):
     @NodePost.node('Frame', 'Panel')
     def wx_setsizer(self, node, parent, params):
         if parent.Sizer is not None and getattr(self.view_model, 'layout', '') == 'SetSizerAndFit':
-            parent.SetSizerAndFit(parent.Sizer)
+            LayoutBatch.layout(parent, fit=True)
 
     @Node.node('Include')
     def include_xml(self):
@@ -1360,6 +2459,28 @@ class UiBuilder(object):
         self.debug_names[constructed.view] = name
         self.children[name] = constructed.view
 
+    @Node.node('Repeat')
+    def repeat(self, node, parent, params):
+        """
+            Builds the children of the node for each item of ItemsSource,
+            in a panel of their own.
+        """
+        attrs = self.eval_args(node.attrib, only_args=self.SizerFlags(parent))
+        host = self.create_widget(wx.Panel, 'Repeat', parent, params, attrs, name=node.attrib.get('Name'))
+        self.create_sizer(wx.BoxSizer, 'BoxSizer', host, {'orient': self.str2py(node.attrib.get('orient', 'VERTICAL'))})
+
+        repeater = host.repeater = Repeater(self, node, host, dict(params or {}))
+
+        source = self.str2py(node.attrib['ItemsSource'])
+        if isinstance(source, tuple):
+            source = source[0]
+
+        if isinstance(source, bind.BindValue):
+            repeater.watch(source)
+            repeater.update(source.value)
+        else:
+            repeater.update(source)
+
     @Node.node('Triggers')
     def triggers(self, node, parent, params):
         for n in node:
@@ -1393,12 +2514,14 @@ class UiBuilder(object):
 
     @Node.node('Styles')
     def push_styles(self, node, parent, params):
-        style_args = {}
-
-        for child in node:
-            style_args[child.tag] = child.attrib
-
-        self.style_args = style_args
+        """
+            Styles are evaluated once, and apply to the rest of the node they
+            are in, on top of the styles of enclosing Styles blocks.
+        """
+        self.styles = StyleSheet(
+            {child.tag: self.eval_args(child.attrib) for child in node},
+            parent=self.styles
+        )
 
     def shortcut(self, val):
         if val is None:
@@ -1449,6 +2572,8 @@ class UiBuilder(object):
 
     @Node.node('Component', 'Mixin')
     def register_component(self, node, parent, params):
+        # default values are stripped from the attributes, keep the parsed tree as is
+        node = clone_element(node)
         name = node.attrib.get('Name')
         parent_type = node.attrib.get('Parent', 'Panel')
 
@@ -1498,6 +2623,7 @@ class UiBuilder(object):
 
         custom_obj._ctor = elem
         custom_obj._overrides = overrides
+        custom_obj._template = ComponentTemplate(custom_obj)
 
         UiBuilder.components[name] = custom_obj
 
@@ -1681,7 +2807,7 @@ class UiBuilder(object):
             params.pop('menu_parent', None)
             self.constructed = menu
 
-        enabled = node.attrib.pop('Enabled', '')
+        enabled = node.attrib.get('Enabled', '')
         if enabled and isinstance(parent, wx.Menu):
             self.create_parent_func_binding(parent, 'Enable', params, id=str(appended.Id), enable=enabled)
 
@@ -1714,11 +2840,11 @@ class UiBuilder(object):
                 self.setup_parent(child, bar, params)
                 continue
 
-            handler = child.attrib.pop('handler', '')
-            enabled = child.attrib.pop('enabled', '')
+            handler = child.attrib.get('handler', '')
+            enabled = child.attrib.get('enabled', '')
 
             if wx_hasattr(child.tag):
-                obj = self.compile(child, bar)
+                obj = self.compile(copy_element(child, exclude=('handler', 'enabled')), bar)
                 item = bar.AddControl(obj)
             else:
                 tid = child.attrib.get('id', 'ANY')
@@ -1798,12 +2924,10 @@ class UiBuilder(object):
 
     @Node.filter(lambda n: n.attrib.get('AutoImport', 'false').lower() == 'true')
     def extra_auto_import(self, node, parent, params):
-        node.attrib.pop('AutoImport')
-
         module, class_name = node.tag.rsplit('.', 1)
         importlib.import_module(module)
         return self.wx_node(
-            node,
+            copy_element(node, exclude=('AutoImport',)),
             parent,
             params,
             root=sys.modules[module],
@@ -1811,6 +2935,24 @@ class UiBuilder(object):
             skip_sizer=True
         )
 
+def discard_resolved(name):
+    """
+        wx_getattr falls back to the registries, so cached resolutions of
+        a name go stale when it is registered again
+    """
+    for key in UiBuilder.resolve_cache.keys():
+        if key[0] == name:
+            UiBuilder.resolve_cache.discard(key)
+
+UiBuilder.components.changed += discard_resolved
+Control.Registry.changed += discard_resolved
+
+# node filters check whether the tag is in one of the registries
+for node_registry in (Node, NodePost):
+    Ui.Registry.changed += node_registry.invalidate
+    Control.Registry.changed += node_registry.invalidate
+    UiBuilder.components.changed += node_registry.invalidate
+
 def load_components(filename : str):
     """
         load defined components from the filename. this is used for
@@ -1846,9 +2988,18 @@ def load_components(filename : str):
         UiBuilder.run_at_start(builder.icons, ico, None, {})
 
 class ViewModel(object):
+    # Xml content to build instead of reading filename
+    xml : Optional[bytes] = None
+    # build the view in time slices, see UiBuilder.build_progressive
+    progressive = False
+    progressive_budget = 0.008
+
     def __init__(self, defer: bool=False, parent : Optional[wx.Object] = None) -> None:
         self._compat_flags = {}
         self.on_close = Event('on_close')
+        self.build_progress = bind.BindValue(0.0)
+        # True when a progressive build stopped at an error
+        self.build_failed = bind.BindValue(False)
         self.initialize()
         if not defer:
             self.build(parent=parent)
@@ -1901,11 +3052,30 @@ class ViewModel(object):
 
         start = time.perf_counter()
 
-        if not Path(self.filename).exists():
+        if self.xml is None and not Path(self.filename).exists():
             raise IOError('XML file not found: %s' % self.filename)
 
-        ui = UiBuilder(self.filename)
-        view = self.view = ui.build(self, parent=parent, sizer_flags=sizer_flags)
+        ui = UiBuilder(self.filename, xml=self.xml)
+
+        if self.progressive:
+            self.view = ui.build_progressive(
+                self, parent=parent, sizer_flags=sizer_flags,
+                progress=self.build_progress,
+                done=lambda view, failed: self.build_done(ui, view, start, failed),
+                budget=self.progressive_budget
+            )
+        else:
+            view = self.view = ui.build(self, parent=parent, sizer_flags=sizer_flags)
+            self.build_done(ui, view, start)
+
+        return self.view
+
+    def build_done(self, ui : 'UiBuilder', view, start : float, failed : bool = False):
+        """
+            Wires up the built view to this view model. When failed, the
+            view was only partly built, see UiBuilder.build_progressive.
+        """
+        self.build_failed.value = failed
 
         if view is not None:
             events = [v for v in view.__dict__.values() if isinstance(v, Event)]
@@ -1923,14 +3093,24 @@ class ViewModel(object):
             for v in ui.values_to_update:
                 v.touch()
 
+            if not failed:
+                self.build_progress.value = 1.0
+
             if self.view is not None:
                 self.ready()
 
             if DEBUG_TIME:
                 print('%s construction time: %.2f seconds' % (self.filename, (end - start)))
 
+        self.report_errors(ui.construction_errors)
+
+    def report_errors(self, errors):
+        """
+            Shows construction errors in the error viewer, or prints them
+            when DEBUG_ERROR_UI is off.
+        """
         if DEBUG_ERROR:
-            for ex, node, parent, trace in ui.construction_errors:
+            for ex, node, parent, trace in errors:
                 if DEBUG_ERROR_UI:
                     ErrorViewModel.instance().add_error(
                         getattr(node, 'tag', str(node)) if node else '',
@@ -1945,11 +3125,9 @@ class ViewModel(object):
                     print('-' * 10)
 
 
-            if len(ui.construction_errors) and DEBUG_ERROR_UI:
+            if len(errors) and DEBUG_ERROR_UI:
                 ErrorViewModel.instance().view.Show()
 
-        return self.view
-
     @invoke_ui
     def show(self, pos):
         self.view.Show(True)
@@ -1959,10 +3137,15 @@ class ViewModel(object):
 class GenericViewModel(ViewModel):
     """
         Useful for prototyping Ui before creating ViewModel,
-        used when no ViewModel was registered for file
+        used when no ViewModel was registered for file.
+        The Xml content can be given as bytes instead of a filename.
     """
     def __init__(self, filename, defer=False):
-        self.filename = filename
+        if isinstance(filename, bytes):
+            self.xml = filename
+            self.filename = '<memory>'
+        else:
+            self.filename = filename
         super().__init__(defer=defer)
 
 
@@ -0,0 +1,148 @@
+import collections
+import sys
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# default for LruCache.get, when None is a value that can be cached
+MISSING = object()
+
+
+class LruCache(object):
+    """
+        Bounded mapping that discards the least recently used entry
+        once more than maxsize entries are stored.
+
+        Lookups are counted, use stats() to see how effective
+        the cache has been.
+    """
+
+    def __init__(self, maxsize : int = 1024, name : Optional[str] = None):
+        self.maxsize = maxsize
+        self.name = name or self.__class__.__name__
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def get(self, key : Hashable, default : Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key : Hashable, value : Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key : Hashable) -> None:
+        self._data.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._data)
+
+    def values(self) -> List[Any]:
+        return list(self._data.values())
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key : Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class ImportWatcher(object):
+    """
+        Reports when modules have been imported since the last check.
+
+        Only the size of sys.modules is compared, so checking is cheap
+        enough to do before every cache lookup.
+    """
+
+    def __init__(self):
+        self._count = len(sys.modules)
+
+    def changed(self) -> bool:
+        count = len(sys.modules)
+        if count != self._count:
+            self._count = count
+            return True
+        return False
+
+
+class FontCache(object):
+    """
+        Interns fonts by how they were made: the base font they were derived
+        from, and the methods and arguments used to derive them. Fonts made
+        differently that end up the same are shared as well, by comparing
+        their native font descriptions.
+
+        Fonts are reference counted by wx, so widgets given the same font
+        share one native font.
+    """
+
+    def __init__(self, maxsize : int = 256, name : str = 'fonts'):
+        self.recipes = LruCache(maxsize=maxsize, name=name)
+        self._fonts = {}
+
+    @staticmethod
+    def describe(font) -> Optional[str]:
+        """
+            Native description of a font, None when the font is not valid.
+        """
+        if font is None or not font.IsOk():
+            return None
+        return font.GetNativeFontInfoDesc()
+
+    def get(self, key : Hashable) -> Any:
+        entry = self.recipes.get(key)
+        return entry[1] if entry is not None else None
+
+    def put(self, key : Hashable, font) -> Any:
+        """
+            Stores font for key, returning the interned font to use instead.
+        """
+        description = self.describe(font)
+        if description is None:
+            return font
+
+        font = self._fonts.setdefault(description, font)
+        self.recipes.put(key, (description, font))
+
+        # drop fonts no longer reachable from a recipe
+        if len(self._fonts) > len(self.recipes):
+            self._fonts = {d: f for d, f in self.recipes.values()}
+
+        return font
+
+    def clear(self) -> None:
+        self.recipes.clear()
+        self._fonts.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.recipes.stats()
+        # each font holds one native font handle, their size in bytes
+        # depends on the platform and is not reported
+        stats['fonts'] = len(self._fonts)
+        return stats
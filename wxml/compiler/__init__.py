@@ -0,0 +1,390 @@
+"""
+    Ahead of time compiler from Xml views to Python modules.
+
+    Each view is turned into a module next to its Xml file (view.xml -> view.xml.py)
+    that constructs the widgets and sizers directly, with attribute values resolved
+    when compiling wherever they do not depend on the view model. Nodes that need
+    the full builder (menus, components, Config, ...) are handed to UiBuilder.compile.
+
+        python -m wxml compile <directory or xml file>...
+"""
+
+import argparse
+import ast
+import concurrent.futures
+import importlib.util
+import keyword
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from xml.etree import ElementTree as ET
+
+import wx
+import wxml
+import wxml.builder
+from wxml.plan import classify_attributes, parse_binding
+
+UI_DECORATOR = re.compile(r'''\bUi\(\s*r?(['"])(?P<filename>[^'"]+)\1''')
+
+# expression nodes that can be evaluated without side effects
+PURE_EXPRESSIONS = (
+    ast.Expression, ast.Name, ast.Load, ast.Attribute, ast.Constant, ast.Tuple,
+    ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop,
+)
+
+HEADER = '''\
+# Generated by `python -m wxml compile` from {source}, changes will be overwritten.
+from xml.etree import ElementTree as ET
+
+import wx
+from wxml.plan import NodePlan
+
+WXML_VERSION = {wxml_version!r}
+WX_VERSION = {wx_version!r}
+CONTROLLER = {controller!r}
+# tags constructed directly, and the number of node filters they were checked against
+TAGS = {tags!r}
+FILTERS = {filters!r}
+
+FALLBACK = [
+{fallback}]
+
+
+def build(b, parent, params, sizer_flags):
+'''
+
+
+def generated_file(filename : Union[str, os.PathLike]) -> Path:
+    return Path(str(filename) + '.py')
+
+
+class ViewGenerator(object):
+    """
+        Writes the Python source for a single Xml view.
+    """
+
+    def __init__(self, filename : Union[str, os.PathLike]):
+        self.filename = Path(filename)
+        self.lines = []
+        self.fallback = []
+        self.tags = set()
+        self._counter = 0
+
+    def generate(self) -> str:
+        root = ET.fromstring(self.filename.read_bytes())
+        controller = root.attrib.pop('Controller', '__main__')
+
+        if self.dispatch(root) is None:
+            self.emit('root = ET.fromstring(FALLBACK[%d])' % self.add_fallback(root))
+            self.emit('root.attrib.update(sizer_flags)')
+            self.emit('return b.compile(root, parent, params)')
+        else:
+            self.emit('return %s' % self.node(root, 'parent', root=True))
+
+        return HEADER.format(
+            source=self.filename.name,
+            wxml_version=wxml.__version__,
+            wx_version=wx.version(),
+            controller=controller,
+            tags=tuple(sorted(self.tags)),
+            filters=len(wxml.builder.Node['filters']),
+            fallback=''.join('    %r,\n' % f for f in self.fallback),
+        ) + '\n'.join('    %s' % line for line in self.lines) + '\n'
+
+    def emit(self, line : str) -> None:
+        self.lines.append(line)
+
+    def variable(self) -> str:
+        name = 'n%d' % self._counter
+        self._counter += 1
+        return name
+
+    def add_fallback(self, element : ET.Element) -> int:
+        element.tail = None
+        self.fallback.append(ET.tostring(element, encoding='unicode'))
+        return len(self.fallback) - 1
+
+    def dispatch(self, element : ET.Element) -> Optional[str]:
+        """
+            Returns 'widget' or 'sizer' for nodes that can be constructed
+            directly, None for nodes that are left to UiBuilder.compile.
+        """
+        try:
+            action = wxml.builder.Node.action_for(element)
+        except Exception:
+            return None
+
+        if not isinstance(getattr(wx, element.tag, None), type) or 'Lazy' in element.attrib:
+            return None
+
+        post = wxml.builder.NodePost.action_for(element)
+        if post is not None and wxml.builder.NodePost['names'].get(element.tag) is not post:
+            return None
+
+        if action is wxml.builder.UiBuilder.wx_node:
+            return 'widget'
+        elif action is wxml.builder.UiBuilder.wx_create_sizer:
+            return 'sizer'
+
+        return None
+
+    def node(self, element : ET.Element, parent : str, root=False) -> str:
+        kind = self.dispatch(element)
+
+        if kind is None:
+            var = self.variable()
+            self.emit('%s = b.compile(ET.fromstring(FALLBACK[%d]), %s, params)' % (
+                var, self.add_fallback(element), parent
+            ))
+            return var
+
+        self.tags.add(element.tag)
+        node_plan = classify_attributes(element.attrib)
+        attrs = self.attributes({
+            k: v for k, v in node_plan.attrib.items() if k not in ('Name', 'ChildParent')
+        })
+        if root:
+            attrs = 'dict(%s, **b.eval_args(sizer_flags))' % attrs
+
+        if kind == 'sizer':
+            self.emit('b.create_sizer(wx.%s, %r, %s, %s)' % (element.tag, element.tag, parent, attrs))
+            self.children(element, parent)
+            return parent
+
+        var = self.variable()
+        extra = ''
+        if 'Name' in element.attrib:
+            extra += ', name=%r' % element.attrib['Name']
+        if node_plan.config or node_plan.events or node_plan.font or node_plan.font_info:
+            extra += ', node_plan=NodePlan({}, {}, %r, %r, %r, %r)' % (
+                node_plan.config, node_plan.events, node_plan.font, node_plan.font_info
+            )
+
+        self.emit('%s = b.create_widget(wx.%s, %r, %s, params, %s%s)' % (
+            var, element.tag, element.tag, parent, attrs, extra
+        ))
+
+        self.children(element, var)
+
+        if wxml.builder.NodePost.action_for(element) is not None:
+            self.emit('b.post_node(%r, %s, params)' % (element.tag, var))
+
+        return var
+
+    def children(self, element : ET.Element, parent : str) -> None:
+        # like UiBuilder.compile_children, Styles only apply to the rest of this node
+        scoped = any(child.tag == 'Styles' for child in element)
+        if scoped:
+            styles = self.variable()
+            self.emit('%s = b.styles' % styles)
+
+        for child in element:
+            self.node(child, parent)
+
+        if scoped:
+            self.emit('b.styles = %s' % styles)
+
+    def attributes(self, attrib : Dict[str, str]) -> str:
+        items = ['%r: %s' % (k, self.value(v)) for k, v in attrib.items()]
+        return '{%s}' % ', '.join(items)
+
+    def value(self, value : str) -> str:
+        # same as UiBuilder.eval_args, component arguments lose their colon
+        if len(value) > 2 and value[1] == ':':
+            value = value[0] + value[2:]
+
+        source = static_source(value)
+        if source is None:
+            return 'b.str2py(%r)' % value
+        return source
+
+
+def static_source(value : str) -> Optional[str]:
+    """
+        Python source that produces the same result as UiBuilder.str2py(value),
+        or None when the result depends on the view being built.
+    """
+    if value == '':
+        # evaluates as an empty expression, sizer flags take this as True
+        return '()'
+
+    if value[0] in '${' or parse_binding(value) is not None:
+        return None
+
+    wx_names = vars(wx)
+
+    if value.isidentifier() and not keyword.iskeyword(value):
+        if value in wx_names:
+            return 'wx.%s' % value
+        return None
+
+    try:
+        literal = ast.literal_eval(value)
+    except (SyntaxError, ValueError):
+        pass
+    else:
+        source = repr(literal)
+        try:
+            if ast.literal_eval(source) == literal:
+                return source
+        except (SyntaxError, ValueError):
+            pass
+        return None
+
+    try:
+        tree = ast.parse('(%s)' % value, mode='eval')
+    except SyntaxError:
+        # str2py would give back the string itself
+        return repr(value) if '.' not in value else None
+
+    for n in ast.walk(tree):
+        if not isinstance(n, PURE_EXPRESSIONS):
+            return None
+        if isinstance(n, ast.Name) and n.id != 'wx' and n.id not in wx_names:
+            return None
+
+    source = ast.unparse(RewriteNames().visit(tree))
+    try:
+        eval(compile(source, '<wxml>', 'eval'), {'wx': wx})
+    except Exception:
+        return None
+
+    return source
+
+
+class RewriteNames(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id == 'wx':
+            return node
+        return ast.copy_location(
+            ast.Attribute(value=ast.Name(id='wx', ctx=ast.Load()), attr=node.id, ctx=ast.Load()),
+            node
+        )
+
+
+def compile_view(filename : Union[str, os.PathLike]) -> Tuple[str, Optional[str]]:
+    """
+        Writes the generated module for the Xml file. Returns the filename and
+        the error message if it could not be compiled.
+    """
+    try:
+        source = ViewGenerator(filename).generate()
+        generated_file(filename).write_text(source)
+    except Exception as ex:
+        return str(filename), '%s: %s' % (ex.__class__.__name__, ex)
+    return str(filename), None
+
+
+def compile_views(filenames : List[Path], jobs : Optional[int] = None) -> List[Tuple[str, Optional[str]]]:
+    if len(filenames) < 2 or jobs == 1:
+        return [compile_view(f) for f in filenames]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(compile_view, filenames))
+
+
+def find_views(paths : Iterable[Path]) -> List[Path]:
+    """
+        Xml files given directly, and those named by a Ui decorator in the
+        Python files found under the given directories.
+    """
+    found = []
+
+    for path in paths:
+        if path.is_dir():
+            for py_file in sorted(path.rglob('*.py')):
+                try:
+                    text = py_file.read_text(errors='replace')
+                except OSError:
+                    continue
+                for match in UI_DECORATOR.finditer(text):
+                    xml_file = (py_file.parent / match.group('filename')).resolve()
+                    if xml_file.is_file():
+                        found.append(xml_file)
+        elif path.suffix.lower() == '.xml':
+            found.append(path.resolve())
+
+    return list(dict.fromkeys(found))
+
+
+class GeneratedView(object):
+    """
+        Loads the generated module for a view, when it is newer than the
+        Xml file and was generated by the running wxml and wxPython versions.
+    """
+
+    enabled = True
+    modules = {}
+
+    @classmethod
+    def load(cls, filename : Union[str, os.PathLike]):
+        if not cls.enabled:
+            return None
+
+        source = generated_file(filename)
+        try:
+            generated_mtime = source.stat().st_mtime
+            if generated_mtime < os.stat(filename).st_mtime:
+                return None
+        except OSError:
+            return None
+
+        key = (str(source), generated_mtime)
+        module = cls.modules.get(key)
+        if module is None:
+            spec = importlib.util.spec_from_file_location('wxml_generated_%d' % len(cls.modules), source)
+            module = importlib.util.module_from_spec(spec)
+            try:
+                spec.loader.exec_module(module)
+            except Exception:
+                module = False
+            else:
+                if module.WXML_VERSION != wxml.__version__ or module.WX_VERSION != wx.version():
+                    module = False
+            cls.modules[key] = module
+
+        if module and cls.usable(module):
+            return module
+        return None
+
+    @staticmethod
+    def usable(module) -> bool:
+        """
+            Tags constructed directly must still be handled by wx_node, registering
+            a component, control or view with the same name changes that.
+        """
+        Node = wxml.builder.Node
+        if len(Node['filters']) != module.FILTERS:
+            return False
+
+        registries = (
+            wxml.builder.Ui.Registry,
+            wxml.builder.Control.Registry,
+            wxml.builder.UiBuilder.components,
+            Node['names'],
+        )
+        return not any(tag in r for tag in module.TAGS for r in registries)
+
+
+def main(argv : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m wxml compile', description='Compile Xml views into Python modules')
+    parser.add_argument('paths', nargs='+', type=Path, help='Xml files, or directories to search for Ui decorated view models')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Number of worker processes')
+    opts = parser.parse_args(argv)
+
+    filenames = find_views(opts.paths)
+    if not filenames:
+        print('no views found')
+        return 1
+
+    failed = 0
+    for filename, error in compile_views(filenames, jobs=opts.jobs):
+        if error is None:
+            print('compiled %s -> %s' % (filename, generated_file(filename).name))
+        else:
+            failed += 1
+            print('failed %s: %s' % (filename, error), file=sys.stderr)
+
+    return 1 if failed else 0
@@ -0,0 +1,261 @@
+import os
+import pickle
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from xml.etree import ElementTree as ET
+
+import wx
+import wxml
+from wxml.cache import LruCache, MISSING
+
+# bumped whenever the layout of BuildPlan, or of its cache file, changes
+PLAN_FORMAT = 2
+
+DEBUG_PLAN = False
+
+BIND_EXPR = re.compile(r'^\(([_A-Za-z0-9\.]+)(?:\[([_A-Za-z0-9\.-]+)\])?(?:\:(EVT_[A-Z_]+)(?:\[([_A-Za-z0-9\.]+)\])?)?\)$')
+
+binding_tokens = LruCache(maxsize=4096, name='bindings')
+
+
+def parse_binding(value : str) -> Optional[Tuple[str, ...]]:
+    """
+        Splits a binding expression into its bind value, to widget transformer,
+        event and from widget transformer. Returns None if value is not a binding.
+    """
+    tokens = binding_tokens.get(value, MISSING)
+    if tokens is MISSING:
+        match = BIND_EXPR.search(value)
+        tokens = match.groups() if match is not None else None
+        binding_tokens.put(value, tokens)
+    return tokens
+
+
+class NodePlan(NamedTuple):
+    """
+        Attributes of a node, split by the prefix that tells wx_node
+        what to do with them.
+    """
+    source : Dict[str, str]
+    attrib : Dict[str, str]
+    config : List[Tuple[str, str]]
+    events : List[Tuple[str, str]]
+    font : List[Tuple[str, str]]
+    font_info : List[Tuple[str, str]]
+
+
+def classify_attributes(attrib : Dict[str, str]) -> NodePlan:
+    plain = {}
+    groups = {
+        'Config.': [],
+        'EventBindings.': [],
+        'Font.': [],
+        'FontInfo.': [],
+    }
+
+    for k, v in attrib.items():
+        prefix, sep, name = k.partition('.')
+        group = groups.get(prefix + sep)
+        if group is None:
+            plain[k] = v
+        else:
+            group.append((name, v))
+
+    return NodePlan(
+        dict(attrib),
+        plain,
+        groups['Config.'],
+        groups['EventBindings.'],
+        groups['Font.'],
+        groups['FontInfo.'],
+    )
+
+
+class BuildPlan(object):
+    """
+        A parsed Xml view, with the attributes of every node already classified
+        and binding expressions already parsed.
+
+        Plans are pickled to Directory (or a __pycache__ directory next to the
+        Xml file when Directory is None), keyed by the modification time and size
+        of the Xml file and the wxml and wxPython versions, so later runs skip
+        reading and parsing it entirely. Persist turns that off, and is False
+        when the WXML_NO_PLAN_CACHE environment variable is set. Like .pyc
+        files, plans are not written when Python is run with -B. Plans that
+        cannot be written, such as for views in a read-only directory, are
+        only used for the current build, which DEBUG_PLAN reports.
+
+        Within a process, plans are shared by every build of the same view
+        through templates, so building must never modify the plan's tree.
+    """
+
+    Directory : Optional[Path] = None
+    Persist = not os.environ.get('WXML_NO_PLAN_CACHE')
+    enabled = True
+
+    # plans by absolute filename (or Xml content), with the file's
+    # modification time and size they were loaded for
+    templates = LruCache(maxsize=128, name='templates')
+
+    hits = 0
+    misses = 0
+
+    def __init__(self, root : ET.Element, controller : str, nodes : List[NodePlan],
+                 bindings : Dict[str, Tuple[str, ...]]):
+        self.root = root
+        self.controller = controller
+        self.nodes = nodes
+        self.bindings = bindings
+        self._by_id = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_by_id'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for value, tokens in self.bindings.items():
+            binding_tokens.put(value, tokens)
+
+    def node(self, element : ET.Element) -> Optional[NodePlan]:
+        """
+            Returns the plan for an element of this tree, or None if the element
+            is not part of it or its attributes have changed since compiling.
+        """
+        if self._by_id is None:
+            self._by_id = {id(e): n for e, n in zip(self.root.iter(), self.nodes)}
+
+        plan = self._by_id.get(id(element))
+        if plan is not None and plan.source == element.attrib:
+            return plan
+        return None
+
+    @classmethod
+    def parse(cls, content : bytes) -> 'BuildPlan':
+        root = ET.fromstring(content)
+        return cls.compile(root, root.attrib.pop('Controller', '__main__'))
+
+    @classmethod
+    def compile(cls, root : ET.Element, controller : str = '__main__') -> 'BuildPlan':
+        nodes = []
+        bindings = {}
+        for element in root.iter():
+            nodes.append(classify_attributes(element.attrib))
+            for value in element.attrib.values():
+                tokens = parse_binding(value)
+                if tokens is not None:
+                    bindings[value] = tokens
+
+        return cls(root, controller, nodes, bindings)
+
+    @staticmethod
+    def cache_key(stat : os.stat_result) -> str:
+        return '%d:%s:%s:%d:%d' % (PLAN_FORMAT, wxml.__version__, wx.version(), stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def cache_file(cls, filename : Union[str, os.PathLike]) -> Path:
+        filename = Path(filename)
+        directory = Path(cls.Directory) if cls.Directory is not None else filename.parent / '__pycache__'
+        return directory / ('%s.wxml-plan' % filename.name)
+
+    @classmethod
+    def load(cls, filename : Union[str, os.PathLike], content : Optional[bytes] = None) -> 'BuildPlan':
+        """
+            Returns the shared plan for the Xml file, or for content when given,
+            which is only parsed again once the file has been modified.
+        """
+        if content is not None:
+            key, stamp = content, None
+        else:
+            stat = os.stat(filename)
+            key, stamp = os.path.abspath(filename), (stat.st_mtime_ns, stat.st_size)
+
+        cached = cls.templates.get(key) if cls.enabled else None
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        if content is not None:
+            plan = cls.parse(content)
+        else:
+            plan = cls.read(filename, stat)
+
+        if cls.enabled:
+            cls.templates.put(key, (stamp, plan))
+        return plan
+
+    @classmethod
+    def read(cls, filename : Union[str, os.PathLike], stat : Optional[os.stat_result] = None) -> 'BuildPlan':
+        """
+            Returns the plan for the Xml file, from the cache if it was written
+            for the file as it is now, otherwise the file is parsed and the cache
+            is updated.
+        """
+        if not cls.enabled or not cls.Persist:
+            return cls.parse(Path(filename).read_bytes())
+
+        # taken before reading, a change in between only makes the cache miss next time
+        key = cls.cache_key(stat or os.stat(filename))
+        cache_file = cls.cache_file(filename)
+
+        plan = cls._read(cache_file, key)
+        if plan is not None:
+            cls.hits += 1
+            return plan
+
+        cls.misses += 1
+        plan = cls.parse(Path(filename).read_bytes())
+        cls._write(cache_file, key, plan)
+        return plan
+
+    @staticmethod
+    def _read(cache_file : Path, key : str) -> Optional['BuildPlan']:
+        try:
+            with cache_file.open('rb') as fp:
+                # the key is pickled on its own, so a stale plan is not unpickled
+                if pickle.load(fp) != key:
+                    return None
+                plan = pickle.load(fp)
+        except Exception:
+            return None
+
+        if DEBUG_PLAN:
+            print('Build plan loaded from %s' % cache_file)
+
+        return plan
+
+    @staticmethod
+    def _write(cache_file : Path, key : str, plan : 'BuildPlan') -> None:
+        if sys.dont_write_bytecode:
+            return
+
+        temp = cache_file.with_name('%s.%d.tmp' % (cache_file.name, os.getpid()))
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with temp.open('wb') as fp:
+                pickle.dump(key, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(plan, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, cache_file)
+        except (OSError, pickle.PicklingError) as ex:
+            # the cache is only an optimization, the plan is used for this build regardless
+            try:
+                temp.unlink()
+            except OSError:
+                pass
+            if DEBUG_PLAN:
+                print('Build plan not written to %s: %s' % (cache_file, ex))
+            return
+
+        if DEBUG_PLAN:
+            print('Build plan written to %s' % cache_file)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            'hits': cls.hits,
+            'misses': cls.misses,
+            'templates': cls.templates.stats(),
+            'bindings': binding_tokens.stats(),
+        }
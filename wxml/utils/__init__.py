@@ -1,3 +1,5 @@
+import collections
+import concurrent.futures
 import os
 from pathlib import Path
 import re
@@ -5,7 +7,7 @@ import glob
 import wx
 import sys
 import wxml.bind
-from typing import Union
+from typing import Any, Callable, Dict, Hashable, Optional, Union
 
 def convert_path(path: Union[str, os.PathLike]) -> str:
     if not isinstance(path, str):
@@ -21,64 +23,305 @@ class Resources(object):
     def Add(self, name, item):
         setattr(Resources, name, item)
 
-class ImgGroup(object):
+class ImageLoader(object):
+    """
+        Reads and decodes image files in a thread pool. Converting them to
+        bitmaps needs the UI thread, and is left to the group they were added to.
+    """
+    enabled = True
+    max_workers = None
+    _pool = None
+
+    @classmethod
+    def submit(cls, path : Union[str, os.PathLike]) -> concurrent.futures.Future:
+        if not cls.enabled:
+            future = concurrent.futures.Future()
+            future.set_result(wx.Image(str(path)))
+            return future
+
+        if cls._pool is None:
+            cls._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=cls.max_workers,
+                thread_name_prefix='wxml-images'
+            )
+        return cls._pool.submit(wx.Image, str(path))
+
+
+class ResourceStore(object):
+    """
+        Loaded resources, kept within budget bytes (None for no limit). When over
+        budget, the least recently used resources that no widget is sharing are
+        dropped, and loaded again the next time they are looked up.
+    """
+    def __init__(self, budget : Optional[int] = 64 * 1024 * 1024, name : str = 'resources'):
+        self.budget = budget
+        self.name = name
+        self.resident = 0
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._evicted = set()
+
+    @staticmethod
+    def size(value) -> int:
+        """
+            Approximate bytes used by a bitmap, icon or icon bundle
+        """
+        if isinstance(value, wx.IconBundle):
+            return sum(ResourceStore.size(value.GetIconByIndex(i)) for i in range(value.GetIconCount()))
+        try:
+            return value.GetWidth() * value.GetHeight() * 4
+        except Exception:
+            return 0
+
+    @staticmethod
+    def in_use(value) -> bool:
+        """
+            Widgets given a bitmap or icon share its native data, which
+            has more than one reference while they exist
+        """
+        try:
+            return value.GetRefData().GetRefCount() > 1
+        except Exception:
+            return False
+
+    def get(self, key : Hashable, load : Callable[[], object]):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        value = load()
+        if key in self._evicted:
+            self._evicted.discard(key)
+            self.reloads += 1
+        else:
+            self.loads += 1
+
+        size = self.size(value)
+        self._entries[key] = (value, size)
+        self.resident += size
+        self.trim(keep=key)
+        return value
+
+    def trim(self, keep : Optional[Hashable] = None) -> None:
+        """
+            Evicts the least recently used resources that are not in use
+            until the resident size is within budget
+        """
+        if self.budget is None:
+            return
+
+        for key in list(self._entries):
+            if self.resident <= self.budget:
+                break
+
+            value, size = self._entries[key]
+            if key == keep or self.in_use(value):
+                continue
+
+            del self._entries[key]
+            self.resident -= size
+            self.evictions += 1
+            self._evicted.add(key)
+
+    def clear(self) -> None:
+        self._evicted.update(self._entries)
+        self._entries.clear()
+        self.resident = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'budget': self.budget,
+            'resident': self.resident,
+            'hits': self.hits,
+            'loads': self.loads,
+            'reloads': self.reloads,
+            'evictions': self.evictions,
+        }
+
+
+class PendingGroup(object):
+    """
+        Resources that are loaded the first time they are looked up, either
+        waiting for them to be decoded in the background, or decoding them
+        then. Loaded resources are kept in store, shared by all groups, which
+        loads them again from their file if they were evicted.
+
+        Images decoded in the background are handed to store once they are
+        ready, so they count towards its budget before they are looked up.
+        That needs the App; images decoded before it exists wait for their
+        first lookup.
+    """
+    store = ResourceStore()
+
     def __init__(self):
+        # first load, for resources decoded in the background
+        self._pending = {}
+        # loads a resource from its file, by name
+        self._loaders = {}
+
+    def _has(self, key : str) -> bool:
+        return key in self._loaders or key in self.__dict__ or hasattr(type(self), key)
+
+    def _defer(self, key : str, path : Path, convert : Callable[[wx.Image], object]) -> None:
+        """
+            Decodes path in the background, convert(image) is called when first looked up
+        """
+        future = ImageLoader.submit(path)
+        self._pending[key] = lambda: convert(future.result())
+        self._register(key, path, lambda p: convert(wx.Image(str(p))))
+        self._adopt(future, lambda: key in self._pending and getattr(self, key))
+
+    def _register(self, key : str, path : Path, load : Callable[[Path], object]) -> None:
+        """
+            Only remembers path, load(path) is called when first looked up
+        """
+        self._loaders[key] = lambda: load(path)
+
+    @staticmethod
+    def _adopt(future : concurrent.futures.Future, load : Callable[[], object]) -> None:
+        """
+            Calls load() on the UI thread once future is done, for it to put the
+            decoded image in store
+        """
+        def adopt():
+            try:
+                load()
+            except Exception:
+                # raised again when it is looked up
+                pass
+
+        def done(f):
+            if wx.App.Get() is not None:
+                wx.CallAfter(adopt)
+
+        future.add_done_callback(done)
+
+    def _load(self, key : str):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            return pending()
+        return self._loaders[key]()
+
+    def __getattr__(self, name):
+        loaders = self.__dict__.get('_loaders')
+        if not loaders or name not in loaders:
+            raise AttributeError(name)
+
+        return self.store.get((self, name), lambda: self._load(name))
+
+    def Wait(self):
+        """
+            Loads every resource that has not been looked up
+        """
+        for name in list(self._pending):
+            getattr(self, name)
+
+    wait = Wait
+
+
+class ImgGroup(PendingGroup):
+    def __init__(self):
+        super().__init__()
         self._map = {}
         self._loaded = {}
 
     def AddMany(self, pattern, mask=None):
         p = convert_path(pattern)
         for g in p.parent.glob(p.name):
-            self.Add(g, mask=mask)
+            self.Add(g, mask=mask, lazy=True)
 
-    def Add(self, path, name=None, mask=None):
+    def Add(self, path, name=None, mask=None, lazy=False):
         path = convert_path(path)
         key = name or path.stem
         key = key.replace(' ', '_')
 
-        if not hasattr(self, key):
-            bmp = wx.Bitmap(wx.Image(str(path)))
+        if not self._has(key):
+            def convert(image):
+                bmp = wx.Bitmap(image)
+                if mask is not None:
+                    mk = wx.Mask(bmp, mask)
+                    bmp.SetMask(mk)
+                return bmp
+
+            if lazy:
+                self._register(key, path, lambda p: convert(wx.Image(str(p))))
+            else:
+                self._defer(key, path, convert)
+
+    def Atlas(self, path, mask=None):
+        """
+            Adds the icons of an atlas made with `python -m wxml atlas`. The atlas
+            is decoded once, and each icon is cut from it the first time it is used.
+        """
+        import wxml.atlas
+
+        path = convert_path(path)
+        sprites = wxml.atlas.read_index(path)
+        pending = [ImageLoader.submit(path)]
+
+        def load_sheet():
+            image = pending.pop().result() if pending else wx.Image(str(path))
+            return wx.Bitmap(image)
+
+        self._adopt(pending[0], lambda: pending and self.store.get((self, path), load_sheet))
+
+        def load(p, rect):
+            bmp = self.store.get((self, p), load_sheet).GetSubBitmap(wx.Rect(*rect))
             if mask is not None:
-                mk = wx.Mask(bmp, mask)
-                bmp.SetMask(mk)
+                bmp.SetMask(wx.Mask(bmp, mask))
+            return bmp
 
-            setattr(self, key, bmp)
+        for name, rect in sprites.items():
+            key = name.replace(' ', '_')
+            if not self._has(key):
+                self._register(key, path, lambda p, rect=rect: load(p, rect))
 
     add = Add
     add_many = AddMany
+    atlas = Atlas
 
-class IconGroup(object):
+class IconGroup(PendingGroup):
     def AddMany(self, pattern):
         p = convert_path(pattern)
         for g in p.parent.glob(p.name):
-            self.Add(g)
+            self.Add(g, lazy=True)
 
-    def Add(self, path, name=None):
+    def Add(self, path, name=None, lazy=False):
         path = convert_path(path)
         key = name or path.stem
         key = key.replace(' ', '_')
 
-        if not hasattr(self, key):
-            icon = wx.Icon(wx.Bitmap(wx.Image(str(path))))
-            setattr(self, key, icon)
+        if not self._has(key):
+            if lazy:
+                self._register(key, path, lambda p: wx.Icon(wx.Bitmap(wx.Image(str(p)))))
+            else:
+                self._defer(key, path, lambda image: wx.Icon(wx.Bitmap(image)))
 
     add = Add
     add_many = AddMany
 
-class IconBundleGroup(object):
+class IconBundleGroup(PendingGroup):
     def AddMany(self, pattern):
         p = convert_path(pattern)
         for g in p.parent.glob(p.name):
-            self.Add(g)
+            self.Add(g, lazy=True)
 
-    def Add(self, path, name=None):
+    def Add(self, path, name=None, lazy=False):
         path = convert_path(path)
         key = name or path.stem
         key = key.replace(' ', '_')
 
-        if not hasattr(self, key):
-            icon = wx.IconBundle(str(path))
-            setattr(self, key, icon)
+        if not self._has(key):
+            self._register(key, path, lambda p: wx.IconBundle(str(p)))
+            if not lazy:
+                getattr(self, key)
 
 
 class NamedTupleSerializer(wxml.bind.BindValueSerializer):